@@ -6,3 +6,4 @@ class ApiConfig(AppConfig):
 
     def ready(self) -> None:
         import api.signals
+        import core.neo4j
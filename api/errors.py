@@ -16,3 +16,16 @@ UNLIKED_ERROR = "You cannot unlike"
 USER_NOT_FOUND_ERROR = "User not found"
 USER_ALREADY_FOLLOWED_ERROR = "You already follow this user"
 UNFOLLOW_ERROR = "You cannot unfollow this user"
+
+INVALID_CURSOR_ERROR = "Invalid cursor"
+
+SEARCH_UNAVAILABLE_ERROR = "Search is not available"
+
+QUERY_TOO_DEEP_ERROR = "The query is too deep"
+QUERY_TOO_COMPLEX_ERROR = "The query is too complex"
+
+# Messages expected by the automatic persisted queries clients
+PERSISTED_QUERY_NOT_FOUND_ERROR = "PersistedQueryNotFound"
+PERSISTED_QUERY_NOT_SUPPORTED_ERROR = "PersistedQueryNotSupported"
+PERSISTED_QUERY_HASH_MISMATCH_ERROR = "provided sha does not match query"
+PERSISTED_QUERY_NOT_ALLOWED_ERROR = "This query is not allowed"
@@ -0,0 +1,25 @@
+from api.graph.schema import CreateConstraint, CreateIndex, CreateRelationshipIndex
+
+operations = [
+    # Lookups by uid, including on the abstract labels used by likes, comments and timelines
+    *(
+        CreateConstraint(label, "uid")
+        for label in [
+            "UserNode",
+            "TweetNode",
+            "ReTweetNode",
+            "CommentNode",
+            "HashtagNode",
+            "LikeableNode",
+            "CommentableNode",
+        ]
+    ),
+    CreateConstraint("HashtagNode", "tag"),
+    # Sort keys of the pages and range of the trending hashtags resync
+    *(CreateIndex(label, "created") for label in ["TweetNode", "CommentNode", "LikeableNode", "UserNode"]),
+    # Sort keys of the timelines, profiles content and likes
+    *(
+        CreateRelationshipIndex(type, "date")
+        for type in ["TIMELINE", "TWEETS", "RETWEETS", "COMMENTS", "LIKES", "FOLLOWS", "HASHTAG"]
+    ),
+]
@@ -0,0 +1,75 @@
+from neomodel import config, db
+
+SCANS = {"AllNodesScan", "NodeByLabelScan"}
+
+
+def connect():
+    if not db.url:
+        db.set_connection(config.DATABASE_URL)
+
+
+def explain(query, params):
+    """
+    The plan of a statement, which is not run
+    """
+    connect()
+    with db.driver.session() as session:
+        return session.run("explain " + query, params).consume().plan
+
+
+def profile(query, params):
+    """
+    The profiled plan of a statement, run in a transaction which is rolled back
+    """
+    connect()
+    with db.driver.session() as session:
+        transaction = session.begin_transaction()
+        try:
+            return transaction.run("profile " + query, params).consume().profile
+        finally:
+            transaction.rollback()
+
+
+def db_hits(plan):
+    return plan.get("dbHits", 0) + sum(db_hits(child) for child in plan.get("children", []))
+
+
+def operators(plan):
+    """
+    The operators of a plan, depth first, as (operatorType, details)
+    """
+    # Operator types have a runtime suffix, as in NodeIndexSeek@slotted
+    operator = plan["operatorType"].split("@")[0]
+    yield operator, plan.get("args", {}).get("Details", "")
+    for child in plan.get("children", []):
+        yield from operators(child)
+
+
+def summarize(plan):
+    """
+    The db hits, operator types and label scans of a profiled plan
+    """
+    plan_operators = {operator for operator, details in operators(plan)}
+    return {
+        "dbHits": db_hits(plan),
+        "operators": sorted(plan_operators),
+        "scans": sorted(plan_operators & SCANS),
+    }
+
+
+def regressions(results, baseline, expected_scans=(), max_growth=0.5, min_hits=100):
+    """
+    The regressions of summarized plans by name against a baseline: new label scans of the statements
+    not in expected_scans, and db hits growing by more than max_growth and min_hits
+    """
+    failures = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+
+        new_scans = set(result["scans"]) - set(previous["scans"] if previous else [])
+        if new_scans and name not in expected_scans:
+            failures.append(f"{name} uses {', '.join(sorted(new_scans))}")
+
+        if previous and result["dbHits"] > max(previous["dbHits"] * (1 + max_growth), previous["dbHits"] + min_hits):
+            failures.append(f"{name} db hits {previous['dbHits']} -> {result['dbHits']}")
+    return failures
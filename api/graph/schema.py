@@ -0,0 +1,119 @@
+import importlib
+import pkgutil
+from time import time
+
+from neomodel import db
+
+MIGRATIONS_PACKAGE = "api.graph.migrations"
+
+
+class Operation:
+    """
+    A schema change, applied with a statement which does nothing when the change already exists
+    """
+
+    # Oldest Neo4j version supporting the statement
+    min_version = (4, 1)
+
+    def statement(self):
+        raise NotImplementedError
+
+    def apply(self):
+        db.cypher_query(self.statement())
+
+
+class CreateConstraint(Operation):
+    def __init__(self, label, property):
+        self.label = label
+        self.property = property
+        self.name = f"{label.lower()}_{property}_unique"
+
+    def __str__(self):
+        return f"Unique {self.label}.{self.property}"
+
+    def statement(self):
+        return (
+            f"create constraint {self.name} if not exists "
+            f"on (n:{self.label}) assert n.{self.property} is unique"
+        )
+
+
+class CreateIndex(Operation):
+    def __init__(self, label, property):
+        self.label = label
+        self.property = property
+        self.name = f"{label.lower()}_{property}"
+
+    def __str__(self):
+        return f"Index {self.label}.{self.property}"
+
+    def statement(self):
+        return f"create index {self.name} if not exists for (n:{self.label}) on (n.{self.property})"
+
+
+class CreateRelationshipIndex(Operation):
+    # Relationship property indexes appeared in Neo4j 4.3
+    min_version = (4, 3)
+
+    def __init__(self, type, property):
+        self.type = type
+        self.property = property
+        self.name = f"{type.lower()}_{property}"
+
+    def __str__(self):
+        return f"Index [:{self.type}].{self.property}"
+
+    def statement(self):
+        return f"create index {self.name} if not exists for ()-[r:{self.type}]-() on (r.{self.property})"
+
+
+def server_version():
+    results, meta = db.cypher_query(
+        "call dbms.components() yield name, versions where name = 'Neo4j Kernel' return versions[0]"
+    )
+    return tuple(int(part) for part in results[0][0].split("-")[0].split(".")[:2])
+
+
+def load_migrations():
+    """
+    The migrations of the migrations package as (name, operations), in name order
+    """
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    names = sorted(name for _, name, is_package in pkgutil.iter_modules(package.__path__) if not is_package)
+    return [(name, importlib.import_module(f"{MIGRATIONS_PACKAGE}.{name}").operations) for name in names]
+
+
+def applied_migrations():
+    results, meta = db.cypher_query("match (m:GraphMigration) return m.name")
+    return {name for name, in results}
+
+
+def migrate(log=print):
+    """
+    Applies the pending migrations. A migration is recorded once all its operations are applied, so
+    that operations skipped because the server is too old are applied after an upgrade.
+    """
+    version = server_version()
+    applied = applied_migrations()
+
+    for name, operations in load_migrations():
+        if name in applied:
+            continue
+
+        skipped = 0
+        for operation in operations:
+            if version < operation.min_version:
+                log(f"  {operation}: skipped, requires Neo4j {'.'.join(map(str, operation.min_version))}")
+                skipped += 1
+                continue
+            operation.apply()
+            log(f"  {operation}")
+
+        if skipped:
+            log(f"{name}: {skipped} operations skipped, not recorded")
+        else:
+            db.cypher_query(
+                "merge (m:GraphMigration {name: $name}) set m.applied = $now",
+                params={"name": name, "now": time()},
+            )
+            log(f"{name}: applied")
@@ -0,0 +1,136 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from time import time
+
+from api.models.autocomplete import HashtagIndex
+from api.models.models import CommentNode, ReTweetNode, TweetNode, UserNode
+from api.models.pagination import encode_cursor
+from api.models.trending import TrendingHashtags
+from api.schema.loaders import Loaders, RelatedLoader
+from api.schema.queries import Query
+from neomodel import db
+from neomodel.util import Database
+
+SAMPLE_UID = "00000000000000000000000000000000"
+
+# Statements which scan a label by design
+EXPECTED_SCANS = {
+    "HashtagIndex.rebuild": "indexes every hashtag",
+}
+
+Samples = namedtuple("Samples", ["user", "other", "tweet", "retweet", "comment", "tag"])
+DEFAULT_SAMPLES = Samples(SAMPLE_UID, SAMPLE_UID, SAMPLE_UID, SAMPLE_UID, SAMPLE_UID, "tag")
+
+
+class Captured(Exception):
+    def __init__(self, query, params):
+        super().__init__(query)
+        self.query = query
+        self.params = params
+
+
+@contextmanager
+def capturing():
+    """
+    Interrupts the code at its first statement, raising it as Captured
+    """
+    cypher_query = Database.cypher_query
+
+    def capture(self, query, params=None, *args, **kwargs):
+        raise Captured(query, params or {})
+
+    Database.cypher_query = capture
+    try:
+        yield
+    finally:
+        Database.cypher_query = cypher_query
+
+
+def capture(call):
+    """
+    The first statement run by a call, as (query, params). Nothing is sent to the database.
+    """
+    with capturing():
+        try:
+            call()
+        except Captured as captured:
+            return captured.query, captured.params
+    raise ValueError("The call did not run any statement")
+
+
+def sample(cls, uid):
+    node = cls(uid=uid)
+    # Some methods check that the node is saved
+    node.id = -1
+    return node
+
+
+def seeded_samples():
+    """
+    Heavy arguments picked from the database: the user following the most accounts, the most
+    followed user, the most liked tweet, the most used hashtag...
+    """
+
+    def pick(query):
+        results, meta = db.cypher_query(query)
+        return results[0][0] if results else SAMPLE_UID
+
+    return Samples(
+        user=pick("match (u:UserNode)-[r:FOLLOWS]->() return u.uid, count(r) as n order by n desc limit 1"),
+        other=pick("match (u:UserNode) return u.uid order by u.followers_count desc limit 1"),
+        tweet=pick("match (t:TweetNode) return t.uid order by t.likes desc limit 1"),
+        retweet=pick("match (t:ReTweetNode) return t.uid order by t.comments desc limit 1"),
+        comment=pick("match (c:CommentNode) return c.uid order by c.likes desc limit 1"),
+        tag=pick("match (h:HashtagNode) return h.tag order by h.tags desc limit 1"),
+    )
+
+
+def registered_calls(samples=DEFAULT_SAMPLES):
+    """
+    The calls running the hot statements, by name
+    """
+    user, other = sample(UserNode, samples.user), sample(UserNode, samples.other)
+    tweet = sample(TweetNode, samples.tweet)
+    retweet = sample(ReTweetNode, samples.retweet)
+    comment = sample(CommentNode, samples.comment)
+    posts = [samples.tweet, samples.retweet, samples.comment]
+    cursor = encode_cursor(time(), SAMPLE_UID)
+    loaders = Loaders()
+
+    return {
+        "UserNode.has_retweeted": lambda: user.has_retweeted(tweet),
+        "UserNode.tweet": lambda: user.tweet("content", ["tag"]),
+        "UserNode.like": lambda: user.like(comment),
+        "UserNode.unlike": lambda: user.unlike(comment),
+        "UserNode.comment": lambda: user.comment(retweet, "content"),
+        "UserNode.retweet": lambda: user.retweet(tweet),
+        "UserNode.follow": lambda: user.follow(other),
+        "UserNode.unfollow": lambda: user.unfollow(other),
+        **{
+            f"UserNode.related.{relation}": lambda relation=relation: user.related(relation, first=20, after=cursor)
+            for relation in UserNode.RELATIONS
+        },
+        "UserNode.content": lambda: user.content(limit=20, after=cursor),
+        "UserNode.feed": lambda: user.feed(limit=20),
+        "UserNode.feed.after": lambda: user.feed(limit=20, after=cursor),
+        "UserNode.fan_out": lambda: user.fan_out(tweet),
+        "UserNode.backfill_timeline": lambda: user.backfill_timeline(other),
+        "UserNode.prune_timeline": lambda: user.prune_timeline(other),
+        "UserNode.backfill_followers": lambda: other.backfill_followers(),
+        "Query.search": lambda: Query.search_page(samples.tag, limit=20, after=cursor),
+        "Query.comments_page": lambda: Query.comments_page(samples.tweet, limit=20, after=cursor),
+        **{
+            f"Loaders.{name}": lambda loader=loader: loader.batch_load_fn(posts)
+            for name, loader in vars(loaders).items()
+            if isinstance(loader, RelatedLoader)
+        },
+        "TrendingHashtags.resync": lambda: TrendingHashtags().resync(),
+        "HashtagIndex.rebuild": lambda: HashtagIndex().rebuild(),
+    }
+
+
+def registered_statements(samples=DEFAULT_SAMPLES):
+    """
+    The hot statements, as {name: (query, params)}, captured from the code which runs them
+    """
+    return {name: capture(call) for name, call in registered_calls(samples).items()}
@@ -0,0 +1,339 @@
+import json
+import random
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean
+from time import perf_counter, process_time
+
+import api.operations as operations
+import requests
+from accounts.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from graphql_jwt.shortcuts import get_token
+from neomodel import db
+from neomodel.util import Database
+
+DEFAULT_MIX = "myFeed=35,search=15,like=15,tweet=5,follow=5,userProfile=25"
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of a list of values
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))]
+
+
+class QueryCounter:
+    """
+    Counts the cypher and sql statements run by the current thread
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+        cypher_query = Database.cypher_query
+        counter = self
+
+        def counted_cypher_query(self, *args, **kwargs):
+            counter.local.cypher = getattr(counter.local, "cypher", 0) + 1
+            return cypher_query(self, *args, **kwargs)
+
+        self._cypher_query = cypher_query
+        Database.cypher_query = counted_cypher_query
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        self.local.sql = getattr(self.local, "sql", 0) + 1
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        self.local.cypher = 0
+        self.local.sql = 0
+
+    def counts(self):
+        return getattr(self.local, "cypher", 0), getattr(self.local, "sql", 0)
+
+    def uninstall(self):
+        Database.cypher_query = self._cypher_query
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a mix of GraphQL operations at a given concurrency and reports latency percentiles, "
+        "throughput and database queries per operation"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Total number of operations")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--mix", default=DEFAULT_MIX, help="Weights of the operations, as name=weight,...")
+        parser.add_argument("--users", type=int, default=100, help="Number of verified users to act as")
+        parser.add_argument(
+            "--url",
+            default=None,
+            help="Benchmark a running server instead of the in-process application. "
+            "Database queries are read from the instrumentation extensions of the responses in that mode, "
+            "which the server only returns in DEBUG.",
+        )
+        parser.add_argument("--output", default=None, help="Write the results to this json file")
+        parser.add_argument("--compare", default=None, help="Fail on regressions against this results file")
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=0.2,
+            help="Allowed relative growth of the p95 latency of an operation when comparing",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.url = options["url"]
+        mix = self.parse_mix(options["mix"])
+
+        self.setup_fixtures(options["users"])
+        plan = self.rng.choices(list(mix), weights=list(mix.values()), k=options["requests"])
+        self.counter = None if self.url else QueryCounter()
+        self.local = threading.local()
+
+        try:
+            start, cpu_start = perf_counter(), process_time()
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                samples = list(executor.map(self.run_operation, plan))
+            elapsed, self.cpu = perf_counter() - start, process_time() - cpu_start
+        finally:
+            if self.counter:
+                self.counter.uninstall()
+
+        results = self.summarize(samples, elapsed, options)
+        self.report(results)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+
+        if options["compare"]:
+            self.compare(results, options["compare"], options["max_regression"])
+
+    def parse_mix(self, mix):
+        weights = {}
+        for item in mix.split(","):
+            name, _, weight = item.partition("=")
+            if not hasattr(self, f"make_{name.strip()}"):
+                raise CommandError(f"Unknown operation {name}")
+            weights[name.strip()] = float(weight or 1)
+        return weights
+
+    def setup_fixtures(self, nb_users):
+        accounts = list(User.objects.filter(status__verified=True, is_active=True)[:nb_users])
+        if not accounts:
+            raise CommandError("No verified user found, seed the databases first")
+        self.tokens = [get_token(account) for account in accounts]
+        self.user_uids = [str(account.uid) for account in accounts]
+
+        results, meta = db.cypher_query("match (h:HashtagNode) return h.tag order by h.tags desc limit 100")
+        self.tags = [tag for tag, in results] or ["benchmark"]
+        results, meta = db.cypher_query("match (t:TweetNode) return t.uid order by t.created desc limit 10000")
+        self.tweet_uids = [uid for uid, in results]
+
+        # Targets each user already liked or followed, which `like` and `follow` never pick again
+        self.targets_lock = threading.Lock()
+        self.liked = {uid: set() for uid in self.user_uids}
+        results, meta = db.cypher_query(
+            "match (u:UserNode)-[:LIKES]->(t:TweetNode) where u.uid in $uids return u.uid, t.uid",
+            {"uids": self.user_uids},
+        )
+        for user_uid, tweet_uid in results:
+            self.liked[user_uid].add(tweet_uid)
+        self.followed = {uid: {uid} for uid in self.user_uids}
+        results, meta = db.cypher_query(
+            "match (u:UserNode)-[:FOLLOWS]->(f:UserNode) where u.uid in $uids return u.uid, f.uid",
+            {"uids": self.user_uids},
+        )
+        for user_uid, followed_uid in results:
+            self.followed[user_uid].add(followed_uid)
+
+    def pick_target(self, candidates, taken):
+        """
+        A random candidate not in `taken`, which it is added to, or None once every candidate is taken
+        """
+        with self.targets_lock:
+            for _ in range(10):
+                target = self.rng.choice(candidates)
+                if target not in taken:
+                    break
+            else:
+                remaining = [candidate for candidate in candidates if candidate not in taken]
+                if not remaining:
+                    return None
+                target = self.rng.choice(remaining)
+            taken.add(target)
+            return target
+
+    # Operations of the user `uid`, returning a query and its variables
+
+    def make_myFeed(self, uid):
+        return operations.my_feed, {"skip": 0, "limit": 20}
+
+    def make_search(self, uid):
+        return operations.search, {"tag": self.rng.choice(self.tags), "limit": 20}
+
+    def make_like(self, uid):
+        # A tweet the user has not liked yet, the feed once they liked them all
+        target = self.pick_target(self.tweet_uids, self.liked[uid]) if self.tweet_uids else None
+        if target is None:
+            return self.make_myFeed(uid)
+        return operations.like, {"uid": target, "type": "TweetType"}
+
+    def make_tweet(self, uid):
+        tags = self.rng.sample(self.tags, min(len(self.tags), self.rng.randint(0, 2)))
+        return operations.tweet, {"content": "Benchmark tweet", "hashtags": tags}
+
+    def make_follow(self, uid):
+        # Neither the user nor someone they already follow, their profile once they follow everyone
+        target = self.pick_target(self.user_uids, self.followed[uid])
+        if target is None:
+            return self.make_userProfile(uid)
+        return operations.follow, {"uid": target}
+
+    def make_userProfile(self, uid):
+        return operations.user_followers, {"uid": self.rng.choice(self.user_uids)}
+
+    def run_operation(self, name):
+        index = self.rng.randrange(len(self.tokens))
+        token = self.tokens[index]
+        query, variables = getattr(self, f"make_{name}")(self.user_uids[index])
+        body = {"query": query, "variables": variables}
+
+        if self.counter:
+            self.counter.reset()
+            with connection.execute_wrapper(self.counter.sql_wrapper):
+                start = perf_counter()
+                payload = self.post_in_process(body, token)
+                duration = perf_counter() - start
+            cypher, sql = self.counter.counts()
+        else:
+            start = perf_counter()
+            payload = self.post_http(body, token)
+            duration = perf_counter() - start
+            instrumentation = (payload or {}).get("extensions", {}).get("instrumentation")
+            cypher, sql = (instrumentation["cypher"], instrumentation["sql"]) if instrumentation else (None, None)
+
+        if payload is None:
+            error = "Invalid response"
+        elif payload.get("errors"):
+            error = payload["errors"][0].get("message")
+        else:
+            error = None
+
+        return {
+            "operation": name,
+            "duration": duration,
+            "error": error,
+            "cypher": cypher,
+            "sql": sql,
+        }
+
+    def post_in_process(self, body, token):
+        if not hasattr(self.local, "client"):
+            self.local.client = Client()
+        response = self.local.client.post(
+            "/graphql/",
+            json.dumps(body),
+            content_type="application/json",
+            secure=True,
+            HTTP_AUTHORIZATION=f"JWT {token}",
+        )
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def post_http(self, body, token):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        try:
+            return self.local.session.post(self.url, json=body, headers={"Authorization": f"JWT {token}"}).json()
+        except (requests.RequestException, ValueError):
+            return None
+
+    def summarize(self, samples, elapsed, options):
+        by_operation = defaultdict(list)
+        for sample in samples:
+            by_operation[sample["operation"]].append(sample)
+
+        def stats(samples):
+            # Error responses are reported apart, they would skew the latencies and the queries per request
+            succeeded = [sample for sample in samples if not sample["error"]]
+            durations = [sample["duration"] * 1000 for sample in succeeded]
+            counted = [sample for sample in succeeded if sample["cypher"] is not None]
+            return {
+                "requests": len(samples),
+                "errors": len(samples) - len(succeeded),
+                "error_messages": dict(Counter(sample["error"] for sample in samples if sample["error"])),
+                "p50_ms": percentile(durations, 50),
+                "p95_ms": percentile(durations, 95),
+                "p99_ms": percentile(durations, 99),
+                "cypher_per_request": mean(sample["cypher"] for sample in counted) if counted else None,
+                "sql_per_request": mean(sample["sql"] for sample in counted) if counted else None,
+            }
+
+        return {
+            "config": {
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "mix": options["mix"],
+                "users": len(self.tokens),
+                "url": self.url,
+            },
+            "elapsed_s": elapsed,
+            "requests_per_s": len(samples) / elapsed if elapsed else None,
+            # CPU time of the whole process, so only meaningful for the in-process application
+            "cpu_ms_per_request": None if self.url or not samples else self.cpu / len(samples) * 1000,
+            "total": stats(samples),
+            "operations": {name: stats(samples) for name, samples in sorted(by_operation.items())},
+        }
+
+    def report(self, results):
+        def fmt(value):
+            return "-" if value is None else f"{value:.1f}"
+
+        self.stdout.write(
+            f"{'operation':<14}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'cypher':>8}{'sql':>6}"
+        )
+        rows = list(results["operations"].items()) + [("total", results["total"])]
+        for name, stats in rows:
+            self.stdout.write(
+                f"{name:<14}{stats['requests']:>9}{stats['errors']:>8}{fmt(stats['p50_ms']):>9}"
+                f"{fmt(stats['p95_ms']):>9}{fmt(stats['p99_ms']):>9}{fmt(stats['cypher_per_request']):>8}"
+                f"{fmt(stats['sql_per_request']):>6}"
+            )
+        for name, stats in results["operations"].items():
+            for message, count in stats["error_messages"].items():
+                self.stdout.write(self.style.WARNING(f"{name}: {count} x {message}"))
+        self.stdout.write(f"{results['requests_per_s']:.1f} requests/s over {results['elapsed_s']:.1f}s")
+        if results["cpu_ms_per_request"] is not None:
+            self.stdout.write(f"{results['cpu_ms_per_request']:.2f}ms of CPU per request")
+
+    def compare(self, results, path, max_regression):
+        with open(path) as file:
+            baseline = json.load(file)
+
+        regressions = []
+        for name, stats in results["operations"].items():
+            previous = baseline["operations"].get(name)
+            if not previous or not previous["p95_ms"]:
+                continue
+            if stats["p95_ms"] is not None and stats["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+                regressions.append(f"{name} p95 {previous['p95_ms']:.1f}ms -> {stats['p95_ms']:.1f}ms")
+            for field in ["cypher_per_request", "sql_per_request"]:
+                if previous.get(field) is not None and stats[field] is not None and stats[field] > previous[field]:
+                    regressions.append(f"{name} {field} {previous[field]:.1f} -> {stats[field]:.1f}")
+
+        if regressions:
+            raise CommandError("Regressions against {}:\n{}".format(path, "\n".join(regressions)))
+        self.stdout.write(self.style.SUCCESS(f"No regression against {path}"))
@@ -0,0 +1,66 @@
+import json
+import os
+
+from api.graph.plans import profile, regressions, summarize
+from api.graph.statements import EXPECTED_SCANS, registered_statements, seeded_samples
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Profiles the registered Cypher statements against a seeded database, with heavy arguments picked "
+        "from the data, and compares their db hits and operators with a baseline. "
+        "Fails when a statement starts scanning a label or its db hits grow past the threshold. "
+        "Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baseline", default="query_plans.json", help="Baseline file")
+        parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+        parser.add_argument(
+            "--max-growth",
+            type=float,
+            default=0.5,
+            help="Allowed relative growth of the db hits of a statement",
+        )
+        parser.add_argument(
+            "--min-hits",
+            type=int,
+            default=100,
+            help="Growths of less db hits than this are ignored",
+        )
+
+    def handle(self, *args, **options):
+        results = {
+            name: summarize(profile(query, params))
+            for name, (query, params) in registered_statements(seeded_samples()).items()
+        }
+
+        baseline = {}
+        if os.path.exists(options["baseline"]):
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        self.stdout.write(f"{'statement':<36}{'db hits':>10}{'baseline':>10}  operators")
+        for name, result in results.items():
+            previous = baseline.get(name)
+            self.stdout.write(
+                f"{name:<36}{result['dbHits']:>10}{previous['dbHits'] if previous else '-':>10}  "
+                f"{', '.join(result['operators'])}"
+            )
+
+        failures = regressions(
+            results, baseline, EXPECTED_SCANS, max_growth=options["max_growth"], min_hits=options["min_hits"]
+        )
+
+        if options["update"]:
+            for failure in failures:
+                self.stdout.write(self.style.WARNING(failure))
+            with open(options["baseline"], "w") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+
+        if failures:
+            raise CommandError("Query plan regressions:\n{}".format("\n".join(failures)))
+        self.stdout.write(self.style.SUCCESS("No query plan regression"))
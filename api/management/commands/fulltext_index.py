@@ -0,0 +1,70 @@
+from time import sleep, time
+
+from api.models.search import LABELS, PROPERTIES, FullTextIndex
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from neomodel import db
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the full-text index of the tweets and comments content, or a new one with --rebuild. "
+        "Neo4j populates the new index in the background while the current one keeps serving the searches, "
+        "the older indexes are dropped once it is online, or by the next run with --no-wait."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Create a new index even if one exists")
+        parser.add_argument("--timeout", type=int, default=3600, help="Seconds to wait for the population")
+        parser.add_argument("--no-wait", action="store_true", help="Do not wait for the population")
+
+    def handle(self, *args, **options):
+        indexes = FullTextIndex.indexes()
+        for name, state, progress in indexes:
+            self.stdout.write(f"{name} {state} {progress:.0f}%")
+
+        if indexes and not options["rebuild"]:
+            self.drop_stale(indexes)
+            self.stdout.write("The index exists, use --rebuild to create a new one")
+            return
+
+        name = f"{settings.FULLTEXT['PREFIX']}_{int(time())}"
+        db.cypher_query(
+            "call db.index.fulltext.createNodeIndex($name, $labels, $properties)",
+            params={"name": name, "labels": LABELS, "properties": PROPERTIES},
+        )
+        self.stdout.write(f"Created {name}")
+
+        if options["no_wait"]:
+            return
+
+        self.wait(name, options["timeout"])
+        # The processes look for the newest online index every REFRESH_INTERVAL seconds
+        self.stdout.write(f"{name} is online, waiting for the processes to switch to it")
+        sleep(FullTextIndex.REFRESH_INTERVAL)
+        self.drop_stale(FullTextIndex.indexes())
+        self.stdout.write(self.style.SUCCESS(f"{name} is in use"))
+
+    def drop_stale(self, indexes):
+        """
+        Drops the indexes older than the newest online one, which is the one used by the searches
+        """
+        online = [name for name, state, progress in indexes if state == "ONLINE"]
+        for name, state, progress in indexes:
+            if online and name < online[0]:
+                db.cypher_query("call db.index.fulltext.drop($name)", params={"name": name})
+                self.stdout.write(f"Dropped {name}")
+
+    def wait(self, name, timeout):
+        deadline = time() + timeout
+        while time() < deadline:
+            states = {index: (state, progress) for index, state, progress in FullTextIndex.indexes()}
+            state, progress = states.get(name, ("MISSING", 0))
+            if state == "ONLINE":
+                return
+            if state != "POPULATING":
+                raise CommandError(f"{name} is {state}")
+            self.stdout.write(f"{name} populating {progress:.0f}%")
+            sleep(5)
+
+        raise CommandError(f"{name} is not online after {timeout}s, the previous indexes are kept")
@@ -0,0 +1,46 @@
+from api.graph.plans import SCANS, explain, operators
+from api.graph.schema import applied_migrations, load_migrations, migrate
+from api.graph.statements import EXPECTED_SCANS, registered_statements
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Applies the pending Neo4j schema migrations of api/graph/migrations: constraints and indexes. "
+        "Run it on deploy, next to the django migrations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--list", action="store_true", help="List the migrations and exit")
+        parser.add_argument(
+            "--report",
+            action="store_true",
+            help="Report the indexes and label scans of the hot statements, from their EXPLAIN plans",
+        )
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            applied = applied_migrations()
+            for name, operations in load_migrations():
+                self.stdout.write(f"[{'X' if name in applied else ' '}] {name}")
+                for operation in operations:
+                    self.stdout.write(f"      {operation}")
+            return
+
+        migrate(log=self.stdout.write)
+
+        if options["report"]:
+            self.report()
+
+    def report(self):
+        for name, (query, params) in registered_statements().items():
+            plan = explain(query, params)
+            indexes = [details or operator for operator, details in operators(plan) if "Index" in operator]
+            scans = [details or operator for operator, details in operators(plan) if operator in SCANS]
+
+            style = self.style.WARNING if scans and name not in EXPECTED_SCANS else self.style.SUCCESS
+            self.stdout.write(style(name))
+            for index in indexes:
+                self.stdout.write(f"    index {index}")
+            for scan in scans:
+                self.stdout.write(self.style.WARNING(f"    scan  {scan}"))
@@ -0,0 +1,48 @@
+import json
+from importlib import import_module
+
+from core.persisted import query_hash
+from core.schema import schema
+from django.core.management.base import BaseCommand, CommandError
+from graphql import parse
+from graphql.error import GraphQLSyntaxError
+from graphql.validation import validate
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the allow-list of the persisted queries, as {sha256: query}, from the GraphQL documents "
+        "defined as strings in the given modules. Set PERSISTED_QUERIES_ALLOW_LIST to its path to only "
+        "execute these queries, so the modules must define every operation of the clients and the file "
+        "must be written again whenever one of them changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "modules",
+            nargs="+",
+            help="Modules defining the queries of the clients. api.operations only holds the ones of the benchmark.",
+        )
+        parser.add_argument("--output", default="persisted_queries.json", help="Allow-list file")
+
+    def handle(self, *args, **options):
+        allow_list = {}
+        for module_name in options["modules"]:
+            module = import_module(module_name)
+            for name, query in vars(module).items():
+                if name.startswith("_") or not isinstance(query, str):
+                    continue
+                try:
+                    document_ast = parse(query)
+                except GraphQLSyntaxError:
+                    continue
+
+                errors = validate(schema, document_ast)
+                if errors:
+                    raise CommandError(f"{module_name}.{name} is invalid: {errors[0]}")
+                allow_list[query_hash(query)] = query
+                self.stdout.write(f"{query_hash(query)} {module_name}.{name}")
+
+        with open(options["output"], "w") as file:
+            json.dump(allow_list, file, indent=2, sort_keys=True)
+        self.stdout.write(f"Wrote {len(allow_list)} queries to {options['output']}")
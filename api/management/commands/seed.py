@@ -0,0 +1,317 @@
+import random
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate
+from time import time
+from uuid import uuid4
+
+from accounts.models import User
+from api.models.models import ReTweetNode, TweetNode
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from graphql_auth.models import UserStatus
+from neomodel import db
+
+DAY = 24 * 60 * 60
+
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class PowerLaw:
+    """
+    Samples indices in [0, n) with a probability proportional to 1 / (rank + 1) ** skew
+    """
+
+    def __init__(self, n, skew, rng):
+        self.cum_weights = list(accumulate(1 / (rank + 1) ** skew for rank in range(n)))
+        self.rng = rng
+
+    def sample(self):
+        return bisect_left(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+
+
+class Command(BaseCommand):
+    help = "Seeds postgres and neo4j with a realistic dataset of users, tweets, hashtags, follows and likes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tweets", type=int, default=20, help="Average number of tweets per user")
+        parser.add_argument("--retweets", type=int, default=5, help="Average number of retweets per user")
+        parser.add_argument("--follows", type=int, default=50, help="Average number of follows per user")
+        parser.add_argument("--likes", type=int, default=50, help="Average number of likes per user")
+        parser.add_argument("--hashtags", type=int, default=500, help="Number of distinct hashtags")
+        parser.add_argument("--skew", type=float, default=1.1, help="Power law exponent of popularity")
+        parser.add_argument("--days", type=int, default=30, help="Spread the content over that many days")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--no-timelines", action="store_true", help="Skip materializing the home timelines")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = time()
+        self.start = self.now - options["days"] * DAY
+        # Namespaces the usernames and emails of this run
+        self.run = uuid4().hex[:8]
+
+        users = self.create_users(options["users"], options["password"])
+        # Popularity follows the user order, shuffled so that it does not follow the creation order
+        self.rng.shuffle(users)
+        tags = self.create_hashtags(options["hashtags"])
+        posts = self.create_tweets(users, tags, options["tweets"], options["skew"])
+        self.follow(users, options["follows"], options["skew"])
+        posts += self.retweet(users, posts, options["retweets"], options["skew"])
+        self.like(users, posts, options["likes"], options["skew"])
+
+        if not options["no_timelines"]:
+            self.materialize_timelines(users)
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded run {self.run} in {time() - self.now:.1f}s"))
+
+    def log(self, message):
+        self.stdout.write(f"[{time() - self.now:7.1f}s] {message}")
+
+    def random_date(self, after=None):
+        return self.rng.uniform(after or self.start, self.now)
+
+    def counts(self, n, average):
+        """
+        Draws n counts with the given average from an exponential distribution
+        """
+        return [int(self.rng.expovariate(1 / average)) if average else 0 for _ in range(n)]
+
+    def write(self, query, rows):
+        for batch in batches(rows, self.batch_size):
+            db.cypher_query(query, params={"rows": batch})
+
+    def create_users(self, n, password):
+        password = make_password(password)
+        uids = [uuid4() for _ in range(n)]
+
+        for batch in batches(uids, self.batch_size):
+            with transaction.atomic():
+                accounts = User.objects.bulk_create(
+                    User(
+                        uid=uid,
+                        username=f"{self.run}_{uid.hex}",
+                        email=f"{self.run}_{uid.hex}@seed.local",
+                        password=password,
+                    )
+                    for uid in batch
+                )
+                UserStatus.objects.bulk_create(UserStatus(user=account, verified=True) for account in accounts)
+
+        uids = [str(uid) for uid in uids]
+        self.write(
+            """
+            unwind $rows as row
+            create (:UserNode {uid: row.uid, created: row.created, followers_count: 0})
+            """,
+            [{"uid": uid, "created": self.random_date()} for uid in uids],
+        )
+        self.log(f"{n} users")
+        return uids
+
+    def create_hashtags(self, n):
+        tags = [f"{self.run}_tag{i}" for i in range(n)]
+        self.write(
+            """
+            unwind $rows as row
+            merge (h:HashtagNode {tag: row.tag})
+            on create set h.uid = row.uid, h.created = row.created, h.tags = 0
+            """,
+            [{"tag": tag, "uid": uuid4().hex, "created": self.start} for tag in tags],
+        )
+        self.log(f"{n} hashtags")
+        return tags
+
+    def create_tweets(self, users, tags, average, skew):
+        tag_law = PowerLaw(len(tags), skew, self.rng) if tags else None
+        tagged = Counter()
+        rows = []
+
+        for author, count in zip(users, self.counts(len(users), average)):
+            for _ in range(count):
+                tweet_tags = {tags[tag_law.sample()] for _ in range(self.rng.randint(0, 3))} if tag_law else set()
+                tagged.update(tweet_tags)
+                rows.append(
+                    {
+                        "author": author,
+                        "uid": uuid4().hex,
+                        "created": self.random_date(),
+                        "content": f"Seeded tweet {' '.join('#' + tag for tag in tweet_tags)}"[:149],
+                        "tags": list(tweet_tags),
+                    }
+                )
+
+        self.write(
+            f"""
+            unwind $rows as row
+            match (u:UserNode)
+            where u.uid = row.author
+            create (u)-[:TWEETS {{date: row.created}}]->(t:{":".join(TweetNode.inherited_labels())} {{
+                uid: row.uid,
+                created: row.created,
+                content: row.content,
+                likes: 0,
+                comments: 0,
+                retweets: 0
+            }})
+            with t, row
+            unwind row.tags as tag
+            match (h:HashtagNode)
+            where h.tag = tag
+            create (t)-[:HASHTAG {{date: row.created}}]->(h)
+            """,
+            rows,
+        )
+        self.write(
+            """
+            unwind $rows as row
+            match (h:HashtagNode)
+            where h.tag = row.tag
+            set h.tags = h.tags + row.count
+            """,
+            [{"tag": tag, "count": count} for tag, count in tagged.items()],
+        )
+        self.log(f"{len(rows)} tweets")
+        return [(row["uid"], row["created"]) for row in rows]
+
+    def follow(self, users, average, skew):
+        law = PowerLaw(len(users), skew, self.rng)
+        followers_count = Counter()
+        rows = []
+
+        for follower, count in zip(users, self.counts(len(users), average)):
+            followed = {users[law.sample()] for _ in range(min(count, len(users) - 1))}
+            followed.discard(follower)
+            followers_count.update(followed)
+            rows += [{"follower": follower, "followed": uid, "date": self.random_date()} for uid in followed]
+
+        self.write(
+            """
+            unwind $rows as row
+            match (a:UserNode), (b:UserNode)
+            where a.uid = row.follower and b.uid = row.followed
+            create (a)-[:FOLLOWS {date: row.date}]->(b)
+            """,
+            rows,
+        )
+        self.write(
+            """
+            unwind $rows as row
+            match (u:UserNode)
+            where u.uid = row.uid
+            set u.followers_count = row.count
+            """,
+            [{"uid": uid, "count": count} for uid, count in followers_count.items()],
+        )
+        self.log(f"{len(rows)} follows, most followed user has {max(followers_count.values(), default=0)} followers")
+
+    def retweet(self, users, tweets, average, skew):
+        if not tweets:
+            return []
+
+        law = PowerLaw(len(tweets), skew, self.rng)
+        retweeted = Counter()
+        rows = []
+
+        for author, count in zip(users, self.counts(len(users), average)):
+            for tweet_uid, tweet_created in {tweets[law.sample()] for _ in range(count)}:
+                retweeted[tweet_uid] += 1
+                rows.append(
+                    {
+                        "author": author,
+                        "tweet": tweet_uid,
+                        "uid": uuid4().hex,
+                        "created": self.random_date(after=tweet_created),
+                    }
+                )
+
+        self.write(
+            f"""
+            unwind $rows as row
+            match (u:UserNode), (t:TweetNode)
+            where u.uid = row.author and t.uid = row.tweet
+            create (u)-[:RETWEETS {{date: row.created}}]->(n:{":".join(ReTweetNode.inherited_labels())} {{
+                uid: row.uid,
+                created: row.created,
+                likes: 0,
+                comments: 0
+            }})-[:ORIGINAL]->(t)
+            """,
+            rows,
+        )
+        self.write(
+            """
+            unwind $rows as row
+            match (t:TweetNode)
+            where t.uid = row.uid
+            set t.retweets = row.count
+            """,
+            [{"uid": uid, "count": count} for uid, count in retweeted.items()],
+        )
+        self.log(f"{len(rows)} retweets")
+        return [(row["uid"], row["created"]) for row in rows]
+
+    def like(self, users, posts, average, skew):
+        if not posts:
+            return
+
+        law = PowerLaw(len(posts), skew, self.rng)
+        likes = Counter()
+        rows = []
+
+        for user, count in zip(users, self.counts(len(users), average)):
+            for uid, created in {posts[law.sample()] for _ in range(count)}:
+                likes[uid] += 1
+                rows.append({"user": user, "likeable": uid, "date": self.random_date(after=created)})
+
+        self.write(
+            """
+            unwind $rows as row
+            match (u:UserNode), (n:LikeableNode)
+            where u.uid = row.user and n.uid = row.likeable
+            create (u)-[:LIKES {date: row.date}]->(n)
+            """,
+            rows,
+        )
+        self.write(
+            """
+            unwind $rows as row
+            match (n:LikeableNode)
+            where n.uid = row.uid
+            set n.likes = row.count
+            """,
+            [{"uid": uid, "count": count} for uid, count in likes.items()],
+        )
+        self.log(f"{len(rows)} likes")
+
+    def materialize_timelines(self, users):
+        params = {
+            "fanoutLimit": settings.TIMELINE["FANOUT_LIMIT"],
+            "maxLength": settings.TIMELINE["MAX_LENGTH"],
+        }
+        # Timelines are larger than the follows, use smaller batches
+        for batch in batches(users, max(1, self.batch_size // 10)):
+            db.cypher_query(
+                """
+                unwind $uids as uid
+                match (u:UserNode)-[:FOLLOWS]->(f:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
+                where u.uid = uid and f.followers_count < $fanoutLimit
+                with u, r, n
+                order by r.date desc
+                with u, collect({node: n, date: r.date})[..$maxLength] as latest
+                unwind latest as post
+                with u, post.node as n, post.date as date
+                create (u)-[:TIMELINE {date: date}]->(n)
+                """,
+                params={**params, "uids": batch},
+            )
+        self.log(f"{len(users)} timelines")
@@ -0,0 +1,92 @@
+import threading
+from collections import namedtuple
+from time import monotonic
+
+from api.models.trending import promote
+from core.neo4j import read_access
+from django.conf import settings
+from neomodel import db
+
+Suggestion = namedtuple("Suggestion", ["tag", "tags"])
+
+
+class TrieNode:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children = {}
+        # The most used tags starting with the prefix of the node, as (tag, count), most used first
+        self.top = []
+
+
+class HashtagIndex:
+    """
+    Prefix tree of the hashtags where every node keeps its TOP_K most used tags, so that completing
+    a prefix only walks its characters.
+
+    The tree is built from the database on first use and rebuilt every REBUILD_INTERVAL seconds to
+    add the tweets of the other processes. Tweets created by this process update it as they are created.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._root = None
+        self._counts = {}
+        self._built = None
+
+    def add(self, tags):
+        with self._lock:
+            if self._root is None:
+                return
+            for tag in tags:
+                self._counts[tag] = self._counts.get(tag, 0) + 1
+                self._insert(self._root, tag, self._counts[tag])
+
+    def complete(self, prefix, limit=10):
+        # A single thread rebuilds the tree, the others keep using the current one unless there is none yet
+        if self._rebuild_due() and self._rebuild_lock.acquire(blocking=self._root is None):
+            try:
+                if self._rebuild_due():
+                    self.rebuild()
+            finally:
+                self._rebuild_lock.release()
+
+        with self._lock:
+            node = self._root
+            for char in prefix:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            return [Suggestion(*item) for item in node.top[:limit]]
+
+    def _rebuild_due(self):
+        return self._built is None or monotonic() - self._built >= settings.AUTOCOMPLETE["REBUILD_INTERVAL"]
+
+    def rebuild(self):
+        # Most used first, so that the top lists fill up with the final tags right away
+        with read_access():
+            results, meta = db.cypher_query("match (h:HashtagNode) return h.tag, h.tags order by h.tags desc")
+
+        root = TrieNode()
+        counts = {}
+        for tag, count in results:
+            counts[tag] = count or 0
+            self._insert(root, tag, counts[tag])
+
+        with self._lock:
+            self._root = root
+            self._counts = counts
+            self._built = monotonic()
+
+    @staticmethod
+    def _insert(root, tag, count):
+        top_k = settings.AUTOCOMPLETE["TOP_K"]
+        node = root
+        promote(node.top, tag, count, top_k)
+        for char in tag:
+            node = node.children.setdefault(char, TrieNode())
+            promote(node.top, tag, count, top_k)
+
+
+hashtag_index = HashtagIndex()
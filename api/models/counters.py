@@ -0,0 +1,121 @@
+import atexit
+import logging
+import os
+import threading
+from collections import Counter, defaultdict
+from time import monotonic, sleep
+
+from django.conf import settings
+from neomodel import db
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """
+    Buffers the likes, retweets and comments deltas of likeable nodes in process and flushes
+    them in batched writes, so that a hot tweet does not turn every like into a write on the same node.
+
+    Deltas are flushed every FLUSH_INTERVAL seconds by a thread of the process, or by the write
+    which finds MAX_PENDING nodes with pending deltas or the oldest one over FLUSH_INTERVAL seconds
+    old. Reads add the deltas which are not flushed yet.
+    """
+
+    FIELDS = ("likes", "retweets", "comments")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._since = None
+        self._thread_pid = None
+
+    def add(self, uid, field, delta=1):
+        """
+        Returns True when the pending deltas, this one included, were flushed by this call
+        """
+        with self._lock:
+            self._pending[uid][field] += delta
+            if self._since is None:
+                self._since = monotonic()
+
+        self._start_thread()
+        if not settings.COUNTERS["FLUSH_INTERVAL"] or self._flush_due():
+            self.flush()
+            return True
+        return False
+
+    def _start_thread(self):
+        if not settings.COUNTERS["FLUSH_THREAD"] or not settings.COUNTERS["FLUSH_INTERVAL"]:
+            return
+        with self._lock:
+            # Threads do not survive a fork
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="counters-flush", daemon=True).start()
+
+    def _run(self):
+        while True:
+            sleep(settings.COUNTERS["FLUSH_INTERVAL"])
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush the counters")
+
+    def pending(self, uid, field):
+        with self._lock:
+            deltas = self._pending.get(uid)
+            return deltas[field] if deltas else 0
+
+    def _flush_due(self):
+        with self._lock:
+            if self._since is None:
+                return False
+            return (
+                monotonic() - self._since >= settings.COUNTERS["FLUSH_INTERVAL"]
+                or len(self._pending) >= settings.COUNTERS["MAX_PENDING"]
+            )
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._since = None
+
+        rows = [
+            {"uid": uid, **{field: deltas[field] for field in self.FIELDS}}
+            for uid, deltas in pending.items()
+            if any(deltas.values())
+        ]
+        if not rows:
+            return
+
+        try:
+            # Fields without delta are not written
+            db.cypher_query(
+                """
+                unwind $rows as row
+                match (n:LikeableNode)
+                where n.uid = row.uid
+                foreach (_ in case when row.likes <> 0 then [1] else [] end |
+                    set n.likes = n.likes + row.likes
+                )
+                foreach (_ in case when row.retweets <> 0 then [1] else [] end |
+                    set n.retweets = n.retweets + row.retweets
+                )
+                foreach (_ in case when row.comments <> 0 then [1] else [] end |
+                    set n.comments = n.comments + row.comments
+                )
+                """,
+                params={"rows": rows},
+            )
+        except Exception:
+            logger.exception("Could not flush %d counters, keeping them pending", len(rows))
+            with self._lock:
+                for uid, deltas in pending.items():
+                    self._pending[uid].update(deltas)
+                if self._since is None:
+                    self._since = monotonic()
+
+
+counters = CounterBuffer()
+atexit.register(counters.flush)
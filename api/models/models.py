@@ -1,3 +1,7 @@
+from time import time
+from uuid import uuid4
+
+from django.conf import settings
 from neomodel import (
     DateTimeProperty,
     IntegerProperty,
@@ -10,6 +14,12 @@ from neomodel import (
 )
 from neomodel.relationship_manager import RelationshipFrom
 
+from api.models.autocomplete import hashtag_index
+from api.models.counters import counters
+from api.models.pagination import paginate
+from api.models.trending import trending
+from core.neo4j import read_access
+
 # Relations
 
 
@@ -48,6 +58,10 @@ class HashtagNode(BaseNode):
     tags = IntegerProperty(default=0)
     tagged_by = RelationshipFrom("TweetNode", "HASHTAG")
 
+    @staticmethod
+    def normalize(tag):
+        return tag.strip().lstrip("#").strip().lower()
+
 
 class CommentNode(LikeableNode):
     content = StringProperty(required=True)
@@ -67,6 +81,16 @@ class ReTweetNode(CommentableNode, LikeableNode):
 
 
 class UserNode(BaseNode):
+    # Patterns from the user `u` to its related nodes `n`, by relation name
+    RELATIONS = {
+        "tweets": "(u:UserNode)-[:TWEETS]->(n:TweetNode)",
+        "retweets": "(u:UserNode)-[:RETWEETS]->(n:ReTweetNode)",
+        "comments": "(u:UserNode)-[:COMMENTS]->(n:CommentNode)",
+        "likes": "(u:UserNode)-[:LIKES]->(n:LikeableNode)",
+        "follows": "(u:UserNode)-[:FOLLOWS]->(n:UserNode)",
+        "followers": "(u:UserNode)<-[:FOLLOWS]-(n:UserNode)",
+    }
+
     tweets = RelationshipTo(TweetNode, "TWEETS", model=DateTimeRel)
     retweets = RelationshipTo(ReTweetNode, "RETWEETS", model=DateTimeRel)
     likes = RelationshipTo(LikeableNode, "LIKES", model=DateTimeRel)
@@ -74,51 +98,381 @@ class UserNode(BaseNode):
     follows = RelationshipTo("UserNode", "FOLLOWS", model=DateTimeRel)
     followers = RelationshipFrom("UserNode", "FOLLOWS", model=DateTimeRel)
     followers_count = IntegerProperty(default=0)
+    timeline = RelationshipTo(LikeableNode, "TIMELINE", model=DateTimeRel)
 
     def has_retweeted(self, tweet):
         params = {"userUID": self.uid, "tweetUID": tweet.uid}
-        results, columns = self.cypher(
+        with read_access():
+            results, columns = self.cypher(
+                """
+                match (u:UserNode)-[:RETWEETS]->(n:ReTweetNode)-[:ORIGINAL]->(t:TweetNode)
+                where u.uid = $userUID and t.uid = $tweetUID
+                return count(n)
+                """,
+                params=params,
+            )
+        return results[0][0] > 0
+
+    def tweet(self, content, tags=()):
+        """
+        Creates a tweet with its hashtags in a single statement
+        """
+        # Normalized tags without duplicates, in order
+        tags = dict.fromkeys(tag for tag in map(HashtagNode.normalize, tags) if tag)
+        params = {
+            "uid": self.uid,
+            "tweetUID": uuid4().hex,
+            "content": content,
+            "tags": [{"tag": tag, "uid": uuid4().hex} for tag in tags],
+            "now": time(),
+        }
+
+        results, meta = db.cypher_query(
+            f"""
+            match (u:UserNode)
+            where u.uid = $uid
+            create (u)-[:TWEETS {{date: $now}}]->(t:{":".join(TweetNode.inherited_labels())} {{
+                uid: $tweetUID,
+                created: $now,
+                content: $content,
+                likes: 0,
+                comments: 0,
+                retweets: 0
+            }})
+            foreach (hashtag in $tags |
+                merge (h:HashtagNode {{tag: hashtag.tag}})
+                on create set h.uid = hashtag.uid, h.created = $now, h.tags = 0
+                set h.tags = h.tags + 1
+                create (t)-[:HASHTAG {{date: $now}}]->(h)
+            )
+            return t
+            """,
+            params=params,
+            resolve_objects=True,
+        )
+        trending.add(tags, params["now"])
+        hashtag_index.add(tags)
+        return results[0][0]
+
+    def like(self, likeable):
+        """
+        Likes a node and counts the like, returns None if the node was already liked
+        """
+        params = {"uid": self.uid, "likeableUID": likeable.uid, "now": time()}
+
+        results, meta = db.cypher_query(
             """
-            match (u:UserNode)-[:RETWEETS]->(n:ReTweetNode)-[:ORIGINAL]->(t:TweetNode)
-            where u.uid = $userUID and t.uid = $tweetUID
-            return count(n)
+            match (u:UserNode), (n:LikeableNode)
+            where u.uid = $uid and n.uid = $likeableUID
+            merge (u)-[r:LIKES]->(n)
+            on create set r.date = $now
+            return n, r.date = $now
             """,
             params=params,
+            resolve_objects=True,
         )
-        return results[0][0] > 0
+        likeable, created = results[0]
+        if not created:
+            return None
 
-    def content(self, skip=0, limit=100):
-        params = {"uid": self.uid, "skip": skip, "limit": limit}
+        # The node read before the flush misses the flushed deltas
+        if counters.add(likeable.uid, "likes", 1):
+            likeable.refresh()
+        return likeable
+
+    def unlike(self, likeable):
+        """
+        Removes a like and uncounts it, returns None if the node was not liked
+        """
+        params = {"uid": self.uid, "likeableUID": likeable.uid}
 
         results, meta = db.cypher_query(
             """
-            match (u:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
-            where u.uid = $uid
+            match (u:UserNode)-[r:LIKES]->(n:LikeableNode)
+            where u.uid = $uid and n.uid = $likeableUID
+            delete r
             return n
-            order by r.date desc
-            skip $skip
-            limit $limit
             """,
             params=params,
             resolve_objects=True,
         )
+        if not results:
+            return None
 
-        return [item[0] for item in results]
+        unliked = results[0][0]
+        if counters.add(unliked.uid, "likes", -1):
+            unliked.refresh()
+        return unliked
 
-    def feed(self, skip=0, limit=100):
-        params = {"uid": self.uid, "skip": skip, "limit": limit}
+    def comment(self, commentable, content):
+        """
+        Creates a comment about a node and counts it
+        """
+        params = {
+            "uid": self.uid,
+            "commentableUID": commentable.uid,
+            "commentUID": uuid4().hex,
+            "content": content,
+            "now": time(),
+        }
+
+        results, meta = db.cypher_query(
+            f"""
+            match (u:UserNode), (t:CommentableNode)
+            where u.uid = $uid and t.uid = $commentableUID
+            create (u)-[:COMMENTS {{date: $now}}]->(c:{":".join(CommentNode.inherited_labels())} {{
+                uid: $commentUID,
+                created: $now,
+                content: $content,
+                likes: 0
+            }})-[:ABOUT]->(t)
+            return c
+            """,
+            params=params,
+            resolve_objects=True,
+        )
+
+        counters.add(commentable.uid, "comments", 1)
+        return results[0][0]
+
+    def retweet(self, tweet):
+        """
+        Creates a retweet of a tweet and counts it, returns None if the tweet was already retweeted
+        """
+        params = {"uid": self.uid, "tweetUID": tweet.uid, "retweetUID": uuid4().hex, "now": time()}
+
+        results, meta = db.cypher_query(
+            f"""
+            match (u:UserNode), (t:TweetNode)
+            where u.uid = $uid and t.uid = $tweetUID
+            merge (u)-[r:RETWEETS]->(n:{":".join(ReTweetNode.inherited_labels())})-[:ORIGINAL]->(t)
+            on create set r.date = $now, n.uid = $retweetUID, n.created = $now, n.likes = 0, n.comments = 0
+            return n, n.uid = $retweetUID
+            """,
+            params=params,
+            resolve_objects=True,
+        )
+        retweet, created = results[0] if results else (None, False)
+        if not created:
+            return None
+
+        counters.add(tweet.uid, "retweets", 1)
+        return retweet
+
+    def follow(self, user):
+        """
+        Follows a user and counts the follower atomically, returns None if the user was already followed
+        """
+        params = {"uid": self.uid, "followedUID": user.uid, "now": time()}
 
         results, meta = db.cypher_query(
             """
-            match (u:UserNode)-[:FOLLOWS]->(f:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
-            where u.uid = $uid
-            return n
-            order by r.date desc
+            match (u:UserNode), (f:UserNode)
+            where u.uid = $uid and f.uid = $followedUID
+            merge (u)-[r:FOLLOWS]->(f)
+            on create set r.date = $now, f.followers_count = f.followers_count + 1
+            return f, r.date = $now
+            """,
+            params=params,
+            resolve_objects=True,
+        )
+        followed, created = results[0]
+        return followed if created else None
+
+    def unfollow(self, user):
+        """
+        Unfollows a user and uncounts the follower atomically, returns None if the user was not followed
+        """
+        params = {"uid": self.uid, "unfollowedUID": user.uid}
+
+        results, meta = db.cypher_query(
+            """
+            match (u:UserNode)-[r:FOLLOWS]->(f:UserNode)
+            where u.uid = $uid and f.uid = $unfollowedUID
+            delete r
+            set f.followers_count = f.followers_count - 1
+            return f
+            """,
+            params=params,
+            resolve_objects=True,
+        )
+        return results[0][0] if results else None
+
+    def related(self, relation, first=None, skip=0, after=None, before=None):
+        """
+        Reads a page of related nodes, newest first
+        """
+        return paginate(
+            f"""
+            match {self.RELATIONS[relation]}
+            where u.uid = $uid {{keyset}}
+            return n, n.created as date
+            order by date {{order}}, n.uid {{order}}
+            skip $skip
+            limit $limit
+            """,
+            {"uid": self.uid},
+            date="n.created",
+            skip=skip,
+            limit=first,
+            after=after,
+            before=before,
+        )
+
+    def content(self, skip=0, limit=100, after=None, before=None):
+        return paginate(
+            """
+            match (u:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
+            where u.uid = $uid {keyset}
+            return n, r.date as date
+            order by date {order}, n.uid {order}
+            skip $skip
+            limit $limit
+            """,
+            {"uid": self.uid},
+            date="r.date",
+            skip=skip,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+
+    def feed(self, skip=0, limit=100, after=None, before=None):
+        """
+        Reads a page of the materialized timeline, merged with the posts of followed accounts
+        that are too large to be fanned out on write
+        """
+        return paginate(
+            """
+            call {{
+                match (u:UserNode)-[r:TIMELINE]->(n:LikeableNode)
+                where u.uid = $uid {keyset}
+                return n, r.date as date
+                union
+                match (u:UserNode)-[:FOLLOWS]->(f:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
+                where u.uid = $uid and f.followers_count >= $fanoutLimit {keyset}
+                return n, r.date as date
+            }}
+            return n, date
+            order by date {order}, n.uid {order}
             skip $skip
             limit $limit
             """,
+            {"uid": self.uid, "fanoutLimit": settings.TIMELINE["FANOUT_LIMIT"]},
+            date="r.date",
+            skip=skip,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+
+    def fan_out(self, node):
+        """
+        Pushes a new tweet or retweet of the user to the timelines of its followers
+        """
+        params = {
+            "uid": self.uid,
+            "nodeUID": node.uid,
+            "fanoutLimit": settings.TIMELINE["FANOUT_LIMIT"],
+            "trimAt": settings.TIMELINE["TRIM_AT"],
+            "maxLength": settings.TIMELINE["MAX_LENGTH"],
+        }
+
+        db.cypher_query(
+            """
+            match (a:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
+            where a.uid = $uid and n.uid = $nodeUID and a.followers_count < $fanoutLimit
+            match (a)<-[:FOLLOWS]-(f:UserNode)
+            create (f)-[:TIMELINE {date: r.date}]->(n)
+            with f
+            where size((f)-[:TIMELINE]->()) > $trimAt
+            match (f)-[t:TIMELINE]->()
+            with f, t
+            order by t.date desc
+            with f, collect(t)[$maxLength..] as overflow
+            foreach (t in overflow | delete t)
+            """,
+            params=params,
+        )
+
+    def backfill_timeline(self, followed):
+        """
+        Copies the latest posts of a newly followed user into the timeline
+        """
+        params = {
+            "uid": self.uid,
+            "followedUID": followed.uid,
+            "fanoutLimit": settings.TIMELINE["FANOUT_LIMIT"],
+            "trimAt": settings.TIMELINE["TRIM_AT"],
+            "maxLength": settings.TIMELINE["MAX_LENGTH"],
+        }
+
+        db.cypher_query(
+            """
+            match (u:UserNode), (f:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
+            where u.uid = $uid and f.uid = $followedUID and f.followers_count < $fanoutLimit
+            with u, r, n
+            order by r.date desc
+            limit $maxLength
+            merge (u)-[t:TIMELINE]->(n)
+            on create set t.date = r.date
+            with distinct u
+            where size((u)-[:TIMELINE]->()) > $trimAt
+            match (u)-[t:TIMELINE]->()
+            with u, t
+            order by t.date desc
+            with u, collect(t)[$maxLength..] as overflow
+            foreach (t in overflow | delete t)
+            """,
             params=params,
-            resolve_objects=True,
         )
 
-        return [item[0] for item in results]
+    def backfill_followers(self):
+        """
+        Copies the latest posts of the user into the timelines of its followers, once it has fewer than
+        FANOUT_LIMIT followers again: its posts are not merged when the feeds are read anymore, and those
+        written since it crossed the limit were not fanned out. Crossing the limit upwards needs nothing,
+        the posts in both the timelines and the followed accounts branch of the feed are merged by the union.
+        """
+        params = {
+            "uid": self.uid,
+            "fanoutLimit": settings.TIMELINE["FANOUT_LIMIT"],
+            "trimAt": settings.TIMELINE["TRIM_AT"],
+            "maxLength": settings.TIMELINE["MAX_LENGTH"],
+        }
+
+        db.cypher_query(
+            """
+            match (f:UserNode)-[r:TWEETS|RETWEETS]->(n:LikeableNode)
+            where f.uid = $uid and f.followers_count < $fanoutLimit
+            with f, r, n
+            order by r.date desc
+            limit $maxLength
+            match (f)<-[:FOLLOWS]-(u:UserNode)
+            merge (u)-[t:TIMELINE]->(n)
+            on create set t.date = r.date
+            with distinct u
+            where size((u)-[:TIMELINE]->()) > $trimAt
+            match (u)-[t:TIMELINE]->()
+            with u, t
+            order by t.date desc
+            with u, collect(t)[$maxLength..] as overflow
+            foreach (t in overflow | delete t)
+            """,
+            params=params,
+        )
+
+    def prune_timeline(self, unfollowed):
+        """
+        Removes the posts of an unfollowed user from the timeline
+        """
+        params = {"uid": self.uid, "unfollowedUID": unfollowed.uid}
+
+        db.cypher_query(
+            """
+            match (u:UserNode)-[t:TIMELINE]->(n:LikeableNode)<-[:TWEETS|RETWEETS]-(f:UserNode)
+            where u.uid = $uid and f.uid = $unfollowedUID
+            delete t
+            """,
+            params=params,
+        )
@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+
+from api.errors import INVALID_CURSOR_ERROR
+from core.neo4j import read_access
+from django.conf import settings
+from neomodel import db
+
+
+def encode_cursor(date, uid):
+    payload = json.dumps([date, uid]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        date, uid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise Exception(INVALID_CURSOR_ERROR)
+    return date, uid
+
+
+class Page(list):
+    """
+    The nodes of a page, newest first, with their cursors and whether more nodes exist past the page
+    """
+
+    def __init__(self, rows, limit, after=None, before=None, skip=0):
+        rows = list(rows)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        backwards = before is not None and after is None
+        if backwards:
+            rows.reverse()
+            self.has_next_page = True
+            self.has_previous_page = has_more
+        else:
+            self.has_next_page = has_more
+            self.has_previous_page = after is not None or skip > 0
+
+        super().__init__(node for node, date in rows)
+        self.cursors = [encode_cursor(date, node.uid) for node, date in rows]
+
+    def dump(self):
+        """
+        The page as a plain value, its nodes as their properties, for the field cache
+        """
+        return {
+            "nodes": [node.__properties__ for node in self],
+            "cursors": self.cursors,
+            "has_next_page": self.has_next_page,
+            "has_previous_page": self.has_previous_page,
+        }
+
+    @classmethod
+    def load(cls, value, node_cls):
+        """
+        Turns a dumped page back into a Page of `node_cls` nodes
+        """
+        page = cls([], 0)
+        page.extend(node_cls(**properties) for properties in value["nodes"])
+        page.cursors = value["cursors"]
+        page.has_next_page = value["has_next_page"]
+        page.has_previous_page = value["has_previous_page"]
+        return page
+
+
+def paginate(query, params, date, skip=0, limit=None, after=None, before=None):
+    """
+    Runs a query returning nodes `n` with their sort key `date` and returns a Page, newest first, of
+    at most MAX_PAGE_SIZE nodes.
+
+    The query must contain a `{keyset}` placeholder at the end of its where clauses and an `{order}`
+    placeholder for its order by clauses. `date` is the expression of the sort key in the where clauses.
+    Cursors turn into range predicates on (date, uid) so that deep pages cost the same as the first one.
+    """
+    skip = skip or 0
+    limits = settings.GRAPHQL_LIMITS
+    limit = limits["DEFAULT_PAGE_SIZE"] if limit is None else max(0, min(limit, limits["MAX_PAGE_SIZE"]))
+    keyset = ""
+    params = {**params, "skip": skip, "limit": limit + 1}
+
+    if after is not None:
+        params["afterDate"], params["afterUID"] = decode_cursor(after)
+        keyset += f" and ({date} < $afterDate or ({date} = $afterDate and n.uid < $afterUID))"
+    if before is not None:
+        params["beforeDate"], params["beforeUID"] = decode_cursor(before)
+        keyset += f" and ({date} > $beforeDate or ({date} = $beforeDate and n.uid > $beforeUID))"
+
+    order = "asc" if before is not None and after is None else "desc"
+
+    with read_access():
+        results, meta = db.cypher_query(
+            query.format(keyset=keyset, order=order),
+            params=params,
+            resolve_objects=True,
+        )
+
+    return Page(results, limit, after=after, before=before, skip=skip)
@@ -0,0 +1,119 @@
+import re
+import threading
+from math import log
+from time import monotonic
+
+from api.errors import SEARCH_UNAVAILABLE_ERROR
+from api.models.pagination import Page, paginate
+from core.neo4j import read_access
+from django.conf import settings
+from neo4j.exceptions import ClientError
+from neomodel import db
+
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+# Operators only in upper case, the analyzer lowercases the terms anyway
+LUCENE_OPERATORS = re.compile(r"\b(AND|OR|NOT)\b")
+
+LABELS = ["TweetNode", "CommentNode"]
+PROPERTIES = ["content"]
+
+
+def escape(query):
+    """
+    Escapes the lucene syntax so that user input is searched as plain terms
+    """
+    return LUCENE_OPERATORS.sub(lambda match: match.group().lower(), LUCENE_SPECIAL.sub(r"\\\1", query))
+
+
+class FullTextIndex:
+    """
+    The full-text index of the tweets and comments content.
+
+    Indexes are named PREFIX_<timestamp> and the newest online one is used, so that a new index can
+    be populated in the background while the current one serves the searches, see the fulltext_index command.
+    """
+
+    REFRESH_INTERVAL = 60
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._name = None
+        self._resolved = None
+
+    @staticmethod
+    def indexes():
+        """
+        The full-text indexes of the posts as (name, state, populationPercent), newest first
+        """
+        with read_access():
+            results, meta = db.cypher_query(
+                """
+                call db.indexes() yield name, type, state, populationPercent
+                where type = 'FULLTEXT' and name starts with $prefix
+                return name, state, populationPercent
+                order by name desc
+                """,
+                params={"prefix": settings.FULLTEXT["PREFIX"] + "_"},
+            )
+        return results
+
+    def name(self):
+        with self._lock:
+            if self._resolved is not None and monotonic() - self._resolved < self.REFRESH_INTERVAL:
+                return self._name
+
+        online = [name for name, state, progress in self.indexes() if state == "ONLINE"]
+        with self._lock:
+            self._name = online[0] if online else None
+            self._resolved = monotonic()
+            return self._name
+
+    def search(self, query, recency_boost=True, limit=20, after=None):
+        """
+        Tweets matching the terms of the query by decreasing relevance, none for a blank query.
+
+        The recency boost halves the relevance every HALF_LIFE seconds of age. Since
+        score * 2 ** (-(now - created) / HALF_LIFE) ranks like log(score) + created * log(2) / HALF_LIFE,
+        the rank does not depend on the time of the request and cursors stay valid.
+        Only the CANDIDATES most relevant tweets are ranked.
+        """
+        if not query.strip():
+            return Page([], limit)
+
+        name = self.name()
+        if name is None:
+            raise Exception(SEARCH_UNAVAILABLE_ERROR)
+
+        boost = log(2) / settings.FULLTEXT["HALF_LIFE"] if recency_boost else 0
+        try:
+            return paginate(
+                """
+                call db.index.fulltext.queryNodes($index, $query) yield node, score
+                where node:TweetNode
+                with node as n, score
+                limit $candidates
+                with n, log(score) + $boost * n.created as rank
+                where n.uid is not null {keyset}
+                return n, rank
+                order by rank {order}, n.uid {order}
+                skip $skip
+                limit $limit
+                """,
+                {
+                    "index": name,
+                    "query": escape(query),
+                    "boost": boost,
+                    "candidates": settings.FULLTEXT["CANDIDATES"],
+                },
+                date="rank",
+                limit=limit,
+                after=after,
+            )
+        except ClientError as error:
+            # Queries the lucene parser still rejects match nothing rather than failing
+            if error.code != "Neo.ClientError.Procedure.ProcedureCallFailed":
+                raise
+            return Page([], limit)
+
+
+fulltext_index = FullTextIndex()
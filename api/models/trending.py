@@ -0,0 +1,161 @@
+import heapq
+import threading
+from collections import Counter, namedtuple
+from time import monotonic, time
+
+from core.neo4j import read_access
+from django.conf import settings
+from neomodel import db
+
+Trend = namedtuple("Trend", ["tag", "count"])
+
+
+def promote(top, tag, count, top_k):
+    """
+    Updates the count of a tag in a list of the top_k (tag, count), most counted first
+    """
+    for i, (top_tag, top_count) in enumerate(top):
+        if top_tag == tag:
+            top[i] = (tag, count)
+            break
+    else:
+        if len(top) >= top_k and count <= top[-1][1]:
+            return
+        top.append((tag, count))
+
+    top.sort(key=lambda item: -item[1])
+    del top[top_k:]
+
+
+class SlidingWindow:
+    """
+    Tag counts over the last `size` buckets of `bucket` seconds, with the top tags kept up to date
+    as tags are counted. Expired buckets are subtracted from the totals when the window slides.
+    """
+
+    def __init__(self, bucket, size, top_k):
+        self.bucket = bucket
+        self.size = size
+        self.top_k = top_k
+        self.buckets = {}
+        self.totals = Counter()
+        self.top = []
+
+    def add(self, tag, count, at):
+        index = int(at // self.bucket)
+        if index <= self.current_index() - self.size:
+            return
+
+        self.buckets.setdefault(index, Counter())[tag] += count
+        self.totals[tag] += count
+        promote(self.top, tag, self.totals[tag], self.top_k)
+
+    def current_index(self):
+        return int(time() // self.bucket)
+
+    def slide(self):
+        oldest = self.current_index() - self.size
+        expired = [index for index in self.buckets if index <= oldest]
+        if not expired:
+            return
+
+        for index in expired:
+            self.totals.subtract(self.buckets.pop(index))
+        self.totals = +self.totals
+        # Counts only decrease here, the top has to be recomputed
+        self.top = heapq.nlargest(self.top_k, self.totals.items(), key=lambda item: item[1])
+
+
+class TrendingHashtags:
+    """
+    Counts the hashtags of the tweets created by this process in minute buckets over the last hour and
+    hour buckets over the last day, so that trending hashtags are read from memory.
+
+    Every RESYNC_INTERVAL seconds the windows are rebuilt from the HASHTAG relationships, which adds the
+    tweets created by the other processes. The tweets counted while the windows are rebuilt are replayed
+    into the new windows, unless they were created before the rebuild started and are already in them.
+    """
+
+    WINDOWS = {
+        "hour": (60, 60),
+        "day": (60 * 60, 24),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resync_lock = threading.Lock()
+        self._windows = None
+        self._synced = None
+        # (tags, at) counted during a resync
+        self._pending = None
+
+    def _new_windows(self):
+        return {
+            name: SlidingWindow(bucket, size, settings.TRENDING["TOP_K"])
+            for name, (bucket, size) in self.WINDOWS.items()
+        }
+
+    def add(self, tags, at=None):
+        at = time() if at is None else at
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((tags, at))
+            if self._windows is None:
+                return
+            for window in self._windows.values():
+                for tag in tags:
+                    window.add(tag, 1, at)
+
+    def top(self, window, limit=10):
+        # A single thread resyncs the windows, the others keep using the current ones unless there are none yet
+        if self._resync_due() and self._resync_lock.acquire(blocking=self._windows is None):
+            try:
+                if self._resync_due():
+                    self.resync()
+            finally:
+                self._resync_lock.release()
+
+        with self._lock:
+            sliding = self._windows[window]
+            sliding.slide()
+            return [Trend(*item) for item in sliding.top[:limit]]
+
+    def _resync_due(self):
+        return self._synced is None or monotonic() - self._synced >= settings.TRENDING["RESYNC_INTERVAL"]
+
+    def resync(self):
+        until = time()
+        with self._lock:
+            self._pending = []
+
+        try:
+            windows = self._new_windows()
+            for name, window in windows.items():
+                with read_access():
+                    results, meta = db.cypher_query(
+                        """
+                        match (t:TweetNode)-[r:HASHTAG]->(h:HashtagNode)
+                        where t.created >= $since and t.created < $until
+                        return h.tag, toInteger(r.date / $bucket) * $bucket, count(*)
+                        """,
+                        params={"since": until - window.bucket * window.size, "until": until, "bucket": window.bucket},
+                    )
+                for tag, at, count in results:
+                    window.add(tag, count, at)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for tags, at in self._pending:
+                if at >= until:
+                    for window in windows.values():
+                        for tag in tags:
+                            window.add(tag, 1, at)
+            self._pending = None
+            self._windows = windows
+            self._synced = monotonic()
+
+
+trending = TrendingHashtags()
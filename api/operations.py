@@ -0,0 +1,99 @@
+# Operations of the frontend, replayed by the benchmark command
+
+# Queries
+
+my_feed = """query myFeed(
+  $skip: Int=0,
+  $limit: Int=10
+) {
+  myFeed(skip: $skip, limit: $limit) {
+    __typename
+    ... on BaseDatedType {
+      uid
+      created
+    }
+    ... on LikeableType {
+      likes
+    }
+    ... on TweetType {
+      content
+    }
+  }
+}
+"""
+
+search = """query mySearch(
+  $tag: String!,
+  $skip: Int,
+  $limit: Int
+) {
+  search(tag: $tag, skip: $skip, limit: $limit){
+    uid
+    content
+    created
+  }
+}
+"""
+
+user_followers = """query userFollowers(
+    $uid: String!
+) {
+  userProfile(uid: $uid) {
+    followers {
+      uid
+      email
+    }
+  }
+}"""
+
+# Mutations
+
+tweet = """mutation newTweet(
+    $content: String!,
+    $hashtags: [String!],
+){
+  tweet(content: $content, hashtags: $hashtags){
+      content
+      likes
+      comments
+      retweets
+      created
+      hashtags {
+        tag
+        tags
+      }
+  }
+}"""
+
+like = """mutation createLike(
+    $uid: String!,
+    $type: String!,
+) {
+  like(uid: $uid, type: $type){
+      __typename
+    ... on BaseDatedType {
+      uid
+    }
+      likes
+    ... on TweetType{
+      content
+    }
+    ... on ReTweetType {
+      comments
+    }
+    ... on CommentType {
+      content
+    }
+  }
+}"""
+
+follow = """mutation followUser(
+  $uid: String!
+) {
+  follow(uid: $uid){
+    uid
+    email
+    username
+    followersCount
+  }
+}"""
@@ -1,8 +1,82 @@
-from api.models.models import UserNode
+from uuid import UUID
+
+from accounts.models import User
+from core.neo4j import read_access
+from neomodel import db
 from promise import Promise
 from promise.dataloader import DataLoader
 
 
-class UserLoader(DataLoader):
+class AccountLoader(DataLoader):
+    """
+    Loads the postgres accounts of a batch of user uids in a single query
+    """
+
+    def batch_load_fn(self, keys):
+        accounts = {account.uid: account for account in User.objects.filter(uid__in=keys)}
+        return Promise.resolve([accounts.get(UUID(str(uid))) for uid in keys])
+
+
+class RelatedLoader(DataLoader):
+    """
+    Loads the nodes `m` related to a batch of nodes `n` through a relationship pattern
+    with a single query. Resolves to a list of nodes when many, to a node or None otherwise.
+    """
+
+    def __init__(self, pattern, many=False):
+        super().__init__()
+        self.pattern = pattern
+        self.many = many
+
     def batch_load_fn(self, keys):
-        return Promise.resolve([UserNode.nodes.get(uid=uid) for uid in keys])
+        with read_access():
+            results, meta = db.cypher_query(
+                f"""
+                unwind $uids as uid
+                match {self.pattern}
+                where n.uid = uid
+                return uid, m
+                """,
+                params={"uids": keys},
+                resolve_objects=True,
+            )
+        related = {uid: [] for uid in keys}
+        for uid, node in results:
+            related[uid].append(node)
+
+        if self.many:
+            return Promise.resolve([related[uid] for uid in keys])
+        return Promise.resolve([related[uid][0] if related[uid] else None for uid in keys])
+
+
+class Loaders:
+    """
+    Registry of the dataloaders of a request
+    """
+
+    def __init__(self):
+        self.accounts = AccountLoader()
+        self.tweet_authors = RelatedLoader("(n:TweetNode)<-[:TWEETS]-(m:UserNode)")
+        self.retweet_authors = RelatedLoader("(n:ReTweetNode)<-[:RETWEETS]-(m:UserNode)")
+        self.comment_authors = RelatedLoader("(n:CommentNode)<-[:COMMENTS]-(m:UserNode)")
+        self.retweeted_tweets = RelatedLoader("(n:ReTweetNode)-[:ORIGINAL]->(m:TweetNode)")
+        self.commented = RelatedLoader("(n:CommentNode)-[:ABOUT]->(m:CommentableNode)")
+        self.comments = RelatedLoader("(n:CommentableNode)<-[:ABOUT]-(m:CommentNode)", many=True)
+        self.hashtags = RelatedLoader("(n:TweetNode)-[:HASHTAG]->(m:HashtagNode)", many=True)
+
+
+def get_loaders(info):
+    """
+    Returns the loaders attached to the request context, so that caches never outlive a request
+    """
+    if not hasattr(info.context, "loaders"):
+        info.context.loaders = Loaders()
+    return info.context.loaders
+
+
+def clear_loaders(context):
+    """
+    Drops the loaders of a request context, whose cached nodes may be stale after a mutation
+    """
+    if hasattr(context, "loaders"):
+        del context.loaders
@@ -12,16 +12,17 @@ from api.errors import (
     UNLIKED_ERROR,
     USER_ALREADY_FOLLOWED_ERROR,
 )
-from api.models.models import CommentNode, ReTweetNode, TweetNode
+from api.models.models import HashtagNode
 from api.schema.types import (
     CommentableType,
     CommentType,
-    HashtagType,
     LikeableType,
     ReTweetType,
     TweetType,
     UserType,
 )
+from core.cache import field_cache
+from django.conf import settings
 from graphene.types.objecttype import ObjectType
 
 
@@ -49,16 +50,8 @@ class CreateComment(graphene.Mutation):
         else:
             raise Exception(NOT_COMMENTABLE)
 
-        comment_node = CommentNode(content=content).save()
-
         user_node = UserType.get_node_from_context(info)
-        user_node.comments.connect(comment_node)
-
-        commentable.comments += 1
-        commentable.save()
-
-        comment_node.about.connect(commentable)
-        return comment_node
+        return user_node.comment(commentable, content)
 
 
 class CreateLike(graphene.Mutation):
@@ -81,14 +74,11 @@ class CreateLike(graphene.Mutation):
             raise Exception(NOT_LIKEABLE)
 
         user = UserType.get_node_from_context(info)
-        if user.likes.is_connected(likeable):
+        liked = user.like(likeable)
+        if liked is None:
             raise Exception(ALREADY_LIKED_ERROR)
 
-        user.likes.connect(likeable)
-        likeable.likes += 1
-        likeable.save()
-
-        return likeable
+        return liked
 
 
 class DeleteLike(graphene.Mutation):
@@ -110,13 +100,11 @@ class DeleteLike(graphene.Mutation):
             raise Exception(UNLIKED_ERROR)
 
         user = UserType.get_node_from_context(info)
-        if not user.likes.is_connected(likeable):
+        unliked = user.unlike(likeable)
+        if unliked is None:
             raise Exception(UNLIKED_ERROR)
 
-        user.likes.disconnect(likeable)
-        likeable.likes -= 1
-        likeable.save()
-        return likeable
+        return unliked
 
 
 class CreateTweet(graphene.Mutation):
@@ -134,16 +122,11 @@ class CreateTweet(graphene.Mutation):
         if len(content) >= 150:
             raise Exception(TWEET_TOO_LONG_ERROR)
 
-        tweet = TweetNode(content=content).save()
         user = UserType.get_node_from_context(info)
-        user.tweets.connect(tweet)
+        tweet = user.tweet(content, hashtags or [])
 
-        if hashtags and hashtags != []:
-            for tag in hashtags:
-                hashtag_node = HashtagType.get_or_create(tag.strip())
-                hashtag_node.tags += 1
-                hashtag_node.save()
-                tweet.hashtags.connect(hashtag_node)
+        user.fan_out(tweet)
+        field_cache.bump(*{f"hashtag:{HashtagNode.normalize(tag)}" for tag in hashtags or []})
 
         return tweet
 
@@ -159,15 +142,11 @@ class CreateReTweet(graphene.Mutation):
         user = UserType.get_node_from_context(info)
         tweet_node = TweetType.get_node(uid=uid)
 
-        if user.has_retweeted(tweet_node):
+        retweet_node = user.retweet(tweet_node)
+        if retweet_node is None:
             raise Exception(ALREADY_RETWEETED_ERROR)
 
-        tweet_node.retweets += 1
-        tweet_node.save()
-
-        retweet_node = ReTweetNode().save()
-        retweet_node.tweet.connect(tweet_node)
-        user.retweets.connect(retweet_node)
+        user.fan_out(retweet_node)
 
         return retweet_node
 
@@ -183,13 +162,12 @@ class FollowUser(graphene.Mutation):
         user = UserType.get_node(uid=uid)
 
         follower = UserType.get_node_from_context(info)
-        if follower.follows.is_connected(user):
+        user = follower.follow(user)
+        if user is None:
             raise Exception(USER_ALREADY_FOLLOWED_ERROR)
 
-        follower.follows.connect(user)
-
-        user.followers_count += 1
-        user.save()
+        follower.backfill_timeline(user)
+        field_cache.bump(f"user:{user.uid}")
 
         return user
 
@@ -205,13 +183,15 @@ class UnFollowUser(graphene.Mutation):
         user = UserType.get_node(uid=uid)
 
         follower = UserType.get_node_from_context(info)
-        if not follower.follows.is_connected(user):
+        user = follower.unfollow(user)
+        if user is None:
             raise Exception(UNFOLLOW_ERROR)
 
-        follower.follows.disconnect(user)
-
-        user.followers_count -= 1
-        user.save()
+        follower.prune_timeline(user)
+        # Fanned out on write again, for the posts written while the followers merged them on read
+        if user.followers_count == settings.TIMELINE["FANOUT_LIMIT"] - 1:
+            user.backfill_followers()
+        field_cache.bump(f"user:{user.uid}")
 
         return user
 
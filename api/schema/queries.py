@@ -1,7 +1,25 @@
 import graphene
 from accounts.decorators import login_required
-from api.schema.types import CommentType, LikeableType, TweetType, UserType
-from neomodel import db
+from api.models.autocomplete import hashtag_index
+from api.models.models import HashtagNode, TweetNode, UserNode
+from api.models.pagination import Page, paginate
+from api.models.search import fulltext_index
+from api.models.trending import trending
+from api.schema.types import (
+    CommentConnection,
+    CommentType,
+    HashtagSuggestionType,
+    LikeableConnection,
+    LikeableType,
+    TrendingHashtagType,
+    TrendingWindow,
+    TweetConnection,
+    TweetType,
+    UserType,
+    connection_from_page,
+)
+from core.cache import field_cache
+from django.conf import settings
 
 
 class Query(graphene.ObjectType):
@@ -10,6 +28,14 @@ class Query(graphene.ObjectType):
         LikeableType,
         skip=graphene.Int(),
         limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    my_feed_connection = graphene.Field(
+        LikeableConnection,
+        limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
     )
 
     user_profile = graphene.Field(
@@ -22,6 +48,35 @@ class Query(graphene.ObjectType):
         tag=graphene.String(required=True),
         skip=graphene.Int(),
         limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    search_connection = graphene.Field(
+        TweetConnection,
+        tag=graphene.String(required=True),
+        limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+
+    search_tweets = graphene.Field(
+        LikeableConnection,
+        query=graphene.String(required=True),
+        cursor=graphene.String(),
+        limit=graphene.Int(default_value=20),
+        recency_boost=graphene.Boolean(default_value=True),
+    )
+
+    trending_hashtags = graphene.List(
+        TrendingHashtagType,
+        window=TrendingWindow(default_value=TrendingWindow.HOUR.value),
+        limit=graphene.Int(default_value=10),
+    )
+
+    autocomplete_hashtags = graphene.List(
+        HashtagSuggestionType,
+        prefix=graphene.String(required=True),
+        limit=graphene.Int(default_value=10),
     )
 
     get_comments = graphene.List(
@@ -29,6 +84,15 @@ class Query(graphene.ObjectType):
         uid=graphene.String(required=True),
         skip=graphene.Int(),
         limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    get_comments_connection = graphene.Field(
+        CommentConnection,
+        uid=graphene.String(required=True),
+        limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
     )
 
     @login_required
@@ -39,46 +103,94 @@ class Query(graphene.ObjectType):
     @login_required
     def resolve_my_feed(root, info, **kwargs):
         user_node = UserType.get_node_from_context(info)
-        return user_node.feed(skip=kwargs["skip"], limit=kwargs["limit"])
+        return user_node.feed(**kwargs)
 
     @login_required
-    def resolve_user_profile(root, info, uid):
-        return UserType.get_node(uid)
+    def resolve_my_feed_connection(root, info, **kwargs):
+        user_node = UserType.get_node_from_context(info)
+        return connection_from_page(LikeableConnection, user_node.feed(**kwargs))
 
     @login_required
-    def resolve_search(root, info, tag, skip=0, limit=100, **kwargs):
-        params = {"tag": tag, "skip": skip, "limit": limit}
+    @field_cache.cached(
+        "Query.userProfile",
+        scopes=lambda uid: [f"user:{uid}"],
+        # The properties of the node, its relations are loaded for every request
+        dump=lambda node: node.__properties__,
+        load=lambda properties: UserNode(**properties),
+    )
+    def resolve_user_profile(root, info, uid):
+        return UserType.get_node(uid)
 
-        results, meta = db.cypher_query(
+    @staticmethod
+    def search_page(tag, **kwargs):
+        return paginate(
             """
-            match (h:HashtagNode)<-[r:HASHTAG]-(t:TweetNode)
-            where h.tag = $tag
-            return t
-            order by t.created desc
+            match (h:HashtagNode)<-[r:HASHTAG]-(n:TweetNode)
+            where h.tag = $tag {keyset}
+            return n, n.created as date
+            order by date {order}, n.uid {order}
             skip $skip
             limit $limit
             """,
-            params=params,
-            resolve_objects=True,
+            {"tag": HashtagNode.normalize(tag)},
+            date="n.created",
+            **kwargs,
         )
 
-        return [item[0] for item in results]
+    @staticmethod
+    @field_cache.cached(
+        "Query.search",
+        scopes=lambda tag, **kwargs: [f"hashtag:{HashtagNode.normalize(tag)}"],
+        # The properties of the tweets, shared by search and searchConnection
+        dump=Page.dump,
+        load=lambda value: Page.load(value, TweetNode),
+    )
+    def cached_search_page(root, info, tag, **kwargs):
+        return Query.search_page(tag, **kwargs)
+
+    @login_required
+    def resolve_search(root, info, tag, **kwargs):
+        return Query.cached_search_page(root, info, tag=tag, **kwargs)
+
+    @login_required
+    def resolve_search_connection(root, info, tag, **kwargs):
+        return connection_from_page(TweetConnection, Query.cached_search_page(root, info, tag=tag, **kwargs))
+
+    @login_required
+    def resolve_search_tweets(root, info, query, limit, recency_boost, cursor=None):
+        limit = max(0, min(limit, settings.FULLTEXT["MAX_LIMIT"]))
+        page = fulltext_index.search(query, recency_boost=recency_boost, limit=limit, after=cursor)
+        return connection_from_page(LikeableConnection, page)
+
+    @login_required
+    def resolve_trending_hashtags(root, info, window, limit):
+        return trending.top(window, max(0, min(limit, settings.TRENDING["TOP_K"])))
 
     @login_required
-    def resolve_get_comments(root, info, uid, skip=0, limit=100, **kwargs):
-        params = {"uid": uid, "skip": skip, "limit": limit}
+    def resolve_autocomplete_hashtags(root, info, prefix, limit):
+        limit = max(0, min(limit, settings.AUTOCOMPLETE["TOP_K"]))
+        return hashtag_index.complete(HashtagNode.normalize(prefix), limit)
 
-        results, meta = db.cypher_query(
+    @staticmethod
+    def comments_page(uid, **kwargs):
+        return paginate(
             """
-            match (t:CommentableNode)<-[r:ABOUT]-(c:CommentNode)
-            where t.uid = $uid
-            return c
-            order by t.created desc
+            match (t:CommentableNode)<-[r:ABOUT]-(n:CommentNode)
+            where t.uid = $uid {keyset}
+            return n, n.created as date
+            order by date {order}, n.uid {order}
             skip $skip
             limit $limit
             """,
-            params=params,
-            resolve_objects=True,
+            {"uid": uid},
+            date="n.created",
+            **kwargs,
         )
 
-        return [item[0] for item in results]
+    @login_required
+    def resolve_get_comments(root, info, uid, **kwargs):
+        return Query.comments_page(uid, **kwargs)
+
+    @login_required
+    def resolve_get_comments_connection(root, info, uid, **kwargs):
+        return connection_from_page(CommentConnection, Query.comments_page(uid, **kwargs))
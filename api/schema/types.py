@@ -1,17 +1,15 @@
 import graphene
-from accounts.models import User
 from api.errors import (
     COMMENT_NOT_FOUND_ERROR,
     RETWEET_NOT_FOUND_ERROR,
     TWEET_NOT_FOUND_ERROR,
     USER_NOT_FOUND_ERROR,
 )
-from api.models.models import CommentNode, HashtagNode, ReTweetNode, TweetNode, UserNode
-from api.schema.loaders import UserLoader
+from api.models.counters import counters
+from api.models.models import CommentNode, ReTweetNode, TweetNode, UserNode
+from api.schema.loaders import get_loaders
 from graphene.types.objecttype import ObjectType
 
-user_loader = UserLoader()
-
 
 class GettableMixin:
     @classmethod
@@ -22,14 +20,6 @@ class GettableMixin:
             raise cls._get_error()
         return node
 
-    @staticmethod
-    def filter_qs(qs, first, skip):
-        if skip:
-            qs = qs[skip:]
-        if first:
-            qs = qs[:first]
-        return qs
-
 
 class BaseDatedType(graphene.Interface):
     uid = graphene.String(required=True)
@@ -39,6 +29,9 @@ class BaseDatedType(graphene.Interface):
 class LikeableType(graphene.Interface):
     likes = graphene.Int()
 
+    def resolve_likes(parent, info):
+        return parent.likes + counters.pending(parent.uid, "likes")
+
     @classmethod
     def resolve_type(cls, instance, info):
         type_class_name = instance.__class__.get_type()
@@ -52,13 +45,20 @@ class HashtagType(GettableMixin, ObjectType):
     tag = graphene.String(required=True)
     tags = graphene.Int()
 
-    @staticmethod
-    def get_or_create(tag):
-        hashtag_node = HashtagNode.nodes.get_or_none(tag=tag)
-        if hashtag_node:
-            return hashtag_node
-        else:
-            return HashtagNode(tag=tag).save()
+
+class HashtagSuggestionType(ObjectType):
+    tag = graphene.String(required=True)
+    tags = graphene.Int(required=True)
+
+
+class TrendingWindow(graphene.Enum):
+    HOUR = "hour"
+    DAY = "day"
+
+
+class TrendingHashtagType(ObjectType):
+    tag = graphene.String(required=True)
+    count = graphene.Int(required=True)
 
 
 class CommentType(GettableMixin, ObjectType):
@@ -78,18 +78,21 @@ class CommentType(GettableMixin, ObjectType):
         return Exception(COMMENT_NOT_FOUND_ERROR)
 
     def resolve_about(parent, info):
-        return parent.about.single()
+        return get_loaders(info).commented.load(parent.uid)
 
     def resolve_author(parent, info):
-        return parent.author.single()
+        return get_loaders(info).comment_authors.load(parent.uid)
 
 
 class CommentableType(graphene.Interface):
     comments = graphene.Int()
     comments_list = graphene.List(CommentType)
 
+    def resolve_comments(parent, info):
+        return parent.comments + counters.pending(parent.uid, "comments")
+
     def resolve_comments_list(parent, info):
-        return parent.commented.all()
+        return get_loaders(info).comments.load(parent.uid)
 
 
 class TweetType(GettableMixin, ObjectType):
@@ -109,11 +112,14 @@ class TweetType(GettableMixin, ObjectType):
     def _get_error():
         return Exception(TWEET_NOT_FOUND_ERROR)
 
+    def resolve_retweets(parent, info):
+        return parent.retweets + counters.pending(parent.uid, "retweets")
+
     def resolve_hashtags(parent, info):
-        return parent.hashtags.all()
+        return get_loaders(info).hashtags.load(parent.uid)
 
     def resolve_author(parent, info):
-        return parent.author.single()
+        return get_loaders(info).tweet_authors.load(parent.uid)
 
 
 class ReTweetType(GettableMixin, ObjectType):
@@ -132,10 +138,53 @@ class ReTweetType(GettableMixin, ObjectType):
         return Exception(RETWEET_NOT_FOUND_ERROR)
 
     def resolve_tweet(parent, info):
-        return parent.tweet.single()
+        return get_loaders(info).retweeted_tweets.load(parent.uid)
 
     def resolve_author(parent, info):
-        return parent.author.single()
+        return get_loaders(info).retweet_authors.load(parent.uid)
+
+
+class LikeableConnection(graphene.relay.Connection):
+    class Meta:
+        node = LikeableType
+
+
+class TweetConnection(graphene.relay.Connection):
+    class Meta:
+        node = TweetType
+
+
+class ReTweetConnection(graphene.relay.Connection):
+    class Meta:
+        node = ReTweetType
+
+
+class CommentConnection(graphene.relay.Connection):
+    class Meta:
+        node = CommentType
+
+
+def related_connection_field(connection_cls):
+    return graphene.Field(
+        connection_cls,
+        first=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+
+
+def connection_from_page(connection_cls, page):
+    """
+    Wraps a Page of nodes in a relay connection with cursors and page info
+    """
+    edges = [connection_cls.Edge(node=node, cursor=cursor) for node, cursor in zip(page, page.cursors)]
+    page_info = graphene.relay.PageInfo(
+        has_next_page=page.has_next_page,
+        has_previous_page=page.has_previous_page,
+        start_cursor=page.cursors[0] if page.cursors else None,
+        end_cursor=page.cursors[-1] if page.cursors else None,
+    )
+    return connection_cls(edges=edges, page_info=page_info)
 
 
 class UserType(GettableMixin, ObjectType):
@@ -146,13 +195,67 @@ class UserType(GettableMixin, ObjectType):
     email = graphene.String()
     username = graphene.String()
     followers_count = graphene.Int()
-    tweets = graphene.List(TweetType, first=graphene.Int(), skip=graphene.Int())
-    retweets = graphene.List(ReTweetType, first=graphene.Int(), skip=graphene.Int())
-    comments = graphene.List(CommentType, first=graphene.Int(), skip=graphene.Int())
-    followers = graphene.List(lambda: UserType, first=graphene.Int(), skip=graphene.Int())
-    follows = graphene.List(lambda: UserType, first=graphene.Int(), skip=graphene.Int())
-    likes = graphene.List(LikeableType, first=graphene.Int(), skip=graphene.Int())
-    content = graphene.List(LikeableType, skip=graphene.Int(), limit=graphene.Int())
+    tweets = graphene.List(
+        TweetType,
+        first=graphene.Int(),
+        skip=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    retweets = graphene.List(
+        ReTweetType,
+        first=graphene.Int(),
+        skip=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    comments = graphene.List(
+        CommentType,
+        first=graphene.Int(),
+        skip=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    followers = graphene.List(
+        lambda: UserType,
+        first=graphene.Int(),
+        skip=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    follows = graphene.List(
+        lambda: UserType,
+        first=graphene.Int(),
+        skip=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    likes = graphene.List(
+        LikeableType,
+        first=graphene.Int(),
+        skip=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    tweets_connection = related_connection_field(TweetConnection)
+    retweets_connection = related_connection_field(ReTweetConnection)
+    comments_connection = related_connection_field(CommentConnection)
+    followers_connection = related_connection_field(lambda: UserConnection)
+    follows_connection = related_connection_field(lambda: UserConnection)
+    likes_connection = related_connection_field(LikeableConnection)
+    content = graphene.List(
+        LikeableType,
+        skip=graphene.Int(),
+        limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
+    content_connection = graphene.Field(
+        LikeableConnection,
+        limit=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+    )
 
     @staticmethod
     def _get_node(uid):
@@ -168,36 +271,54 @@ class UserType(GettableMixin, ObjectType):
         return cls._get_node(user_uid)
 
     def resolve_email(parent, info):
-        return User.objects.get(uid=parent.uid).email
+        return get_loaders(info).accounts.load(parent.uid).then(lambda account: account and account.email)
 
     def resolve_username(parent, info):
-        return User.objects.get(uid=parent.uid).username
+        return get_loaders(info).accounts.load(parent.uid).then(lambda account: account and account.username)
 
-    def resolve_tweets(parent, info, first=None, skip=None):
-        qs = parent.tweets.order_by("-created")
-        return GettableMixin.filter_qs(qs, first, skip)
+    def resolve_tweets(parent, info, **kwargs):
+        return parent.related("tweets", **kwargs)
 
-    def resolve_retweets(parent, info, first=None, skip=None):
-        qs = parent.retweets.order_by("-created")
-        return GettableMixin.filter_qs(qs, first, skip)
+    def resolve_tweets_connection(parent, info, **kwargs):
+        return connection_from_page(TweetConnection, parent.related("tweets", **kwargs))
 
-    def resolve_comments(parent, info, first=None, skip=None):
-        qs = parent.comments.order_by("-created")
-        return GettableMixin.filter_qs(qs, first, skip)
+    def resolve_retweets(parent, info, **kwargs):
+        return parent.related("retweets", **kwargs)
 
-    def resolve_followers(parent, info, first=None, skip=None):
-        followers_keys = [follower.uid for follower in parent.followers.order_by("-created")]
-        followers_keys = GettableMixin.filter_qs(followers_keys, first, skip)
-        return user_loader.load_many(followers_keys)
+    def resolve_retweets_connection(parent, info, **kwargs):
+        return connection_from_page(ReTweetConnection, parent.related("retweets", **kwargs))
 
-    def resolve_follows(parent, info, first=None, skip=None):
-        follows_keys = [followed.uid for followed in parent.follows.order_by("-created")]
-        follows_keys = GettableMixin.filter_qs(follows_keys, first, skip)
-        return user_loader.load_many(follows_keys)
+    def resolve_comments(parent, info, **kwargs):
+        return parent.related("comments", **kwargs)
 
-    def resolve_likes(parent, info, first=None, skip=None):
-        qs = parent.likes.order_by("-created")
-        return GettableMixin.filter_qs(qs, first, skip)
+    def resolve_comments_connection(parent, info, **kwargs):
+        return connection_from_page(CommentConnection, parent.related("comments", **kwargs))
+
+    def resolve_followers(parent, info, **kwargs):
+        return parent.related("followers", **kwargs)
+
+    def resolve_followers_connection(parent, info, **kwargs):
+        return connection_from_page(UserConnection, parent.related("followers", **kwargs))
+
+    def resolve_follows(parent, info, **kwargs):
+        return parent.related("follows", **kwargs)
+
+    def resolve_follows_connection(parent, info, **kwargs):
+        return connection_from_page(UserConnection, parent.related("follows", **kwargs))
+
+    def resolve_likes(parent, info, **kwargs):
+        return parent.related("likes", **kwargs)
+
+    def resolve_likes_connection(parent, info, **kwargs):
+        return connection_from_page(LikeableConnection, parent.related("likes", **kwargs))
 
     def resolve_content(parent, info, **kwargs):
-        return parent.content(skip=kwargs["skip"], limit=kwargs["limit"])
+        return parent.content(**kwargs)
+
+    def resolve_content_connection(parent, info, **kwargs):
+        return connection_from_page(LikeableConnection, parent.content(**kwargs))
+
+
+class UserConnection(graphene.relay.Connection):
+    class Meta:
+        node = UserType
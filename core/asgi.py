@@ -0,0 +1,21 @@
+"""
+ASGI config for core project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Served by uvicorn workers, for instance:
+
+    gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+# Serves the GraphQL operations from a thread pool instead of blocking the event loop, see core/views.py
+os.environ.setdefault("DJANGO_ASGI", "True")
+
+application = get_asgi_application()
@@ -0,0 +1,113 @@
+import hashlib
+import json
+from functools import wraps
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.lru import LRUCache
+from core.metrics import FIELD_CACHE_REQUESTS
+
+MISSING = object()
+
+
+class LocalMemoryBackend:
+    """
+    Per process LRU, invalidations are not seen by the other processes before the entries expire
+    """
+
+    def __init__(self, options):
+        self.entries = LRUCache(options["MAX_SIZE"])
+
+    def get(self, key, default=None):
+        return self.entries.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.entries.set(key, value, ttl)
+
+
+class DjangoCacheBackend:
+    """
+    Django cache framework backend, values are pickled
+    """
+
+    def __init__(self, options):
+        self.cache = caches[options["CACHE"]]
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.cache.set(key, value, ttl)
+
+
+BACKENDS = {
+    "local": LocalMemoryBackend,
+    "django": DjangoCacheBackend,
+}
+
+
+class FieldCache:
+    """
+    Caches the results of resolvers which do not depend on the user, keyed by field, arguments and
+    the versions of the scopes they depend on (`hashtag:<tag>`, `user:<uid>`...).
+
+    Bumping the version of a scope replaces it with a new random version, so that the entries
+    computed with the previous one are not used anymore and get evicted.
+    """
+
+    def __init__(self):
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = BACKENDS[settings.FIELD_CACHE["BACKEND"]](settings.FIELD_CACHE)
+        return self._backend
+
+    def version(self, scope):
+        key = f"version:{scope}"
+        version = self.backend.get(key)
+        if version is None:
+            version = uuid4().hex
+            self.backend.set(key, version)
+        return version
+
+    def bump(self, *scopes):
+        for scope in scopes:
+            self.backend.set(f"version:{scope}", uuid4().hex)
+
+    def cached(self, field, scopes=lambda **kwargs: (), dump=None, load=None):
+        """
+        Decorates a resolver. `scopes` returns the scopes of the result from the resolver arguments.
+        `dump` turns the result into the plain value stored in the cache, and `load` turns it back.
+        """
+
+        def decorator(resolver):
+            @wraps(resolver)
+            def wrapper(root, info, **kwargs):
+                ttl = settings.FIELD_CACHE["TTL"]
+                if not ttl:
+                    return resolver(root, info, **kwargs)
+
+                versions = [self.version(scope) for scope in scopes(**kwargs)]
+                payload = json.dumps([field, kwargs, versions], sort_keys=True, default=str)
+                key = f"field:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+                value = self.backend.get(key, MISSING)
+                if value is not MISSING:
+                    FIELD_CACHE_REQUESTS.labels(field, "hit").inc()
+                    return load(value) if load and value is not None else value
+
+                FIELD_CACHE_REQUESTS.labels(field, "miss").inc()
+                value = resolver(root, info, **kwargs)
+                self.backend.set(key, dump(value) if dump and value is not None else value, ttl)
+                return value
+
+            return wrapper
+
+        return decorator
+
+
+field_cache = FieldCache()
@@ -0,0 +1,198 @@
+from functools import partial
+
+from api.errors import QUERY_TOO_COMPLEX_ERROR, QUERY_TOO_DEEP_ERROR
+from django.conf import settings
+from graphql import GraphQLError
+from graphql.backend.base import GraphQLDocument
+from graphql.backend.core import GraphQLCoreBackend
+from graphql.execution import ExecutionResult, execute
+from graphql.execution.values import get_argument_values, get_variable_values
+from graphql.language import ast
+from graphql.type import GraphQLList, GraphQLNonNull, get_named_type, is_leaf_type
+from graphql.utils.get_operation_ast import get_operation_ast
+from graphql.utils.type_from_ast import type_from_ast
+from graphql.validation import validate
+
+# Arguments bounding the number of items returned by a field
+SIZE_ARGUMENTS = ("first", "last", "limit")
+
+
+class Analysis:
+    """
+    Depth and estimated cost of an operation, for given variables.
+
+    A field costs its weight, 1 for objects and 0 for scalars unless set in WEIGHTS, plus the cost of its
+    selections, for each of the items it returns: its first, last or limit argument up to MAX_PAGE_SIZE,
+    DEFAULT_PAGE_SIZE when it accepts one without being given any, DEFAULT_LIST_SIZE for other lists.
+    """
+
+    def __init__(self, schema, document_ast, operation, variables):
+        self.schema = schema
+        self.operation = operation
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document_ast.definitions
+            if isinstance(definition, ast.FragmentDefinition)
+        }
+        self.variables = variables
+        self.depth = 0
+        root_type = {
+            "query": schema.get_query_type(),
+            "mutation": schema.get_mutation_type(),
+            "subscription": schema.get_subscription_type(),
+        }[operation.operation]
+        self.cost = self.selection_cost(root_type, operation.selection_set, 1)
+
+    def fields(self, parent_type, selection_set, visited=()):
+        """
+        The fields of a selection set with their parent type, through fragments
+        """
+        for selection in selection_set.selections:
+            if isinstance(selection, ast.Field):
+                yield parent_type, selection
+            elif isinstance(selection, ast.InlineFragment):
+                fragment_type = selection.type_condition and type_from_ast(self.schema, selection.type_condition)
+                yield from self.fields(fragment_type or parent_type, selection.selection_set, visited)
+            elif isinstance(selection, ast.FragmentSpread):
+                name = selection.name.value
+                fragment = self.fragments.get(name)
+                if fragment is not None and name not in visited:
+                    fragment_type = type_from_ast(self.schema, fragment.type_condition)
+                    yield from self.fields(fragment_type or parent_type, fragment.selection_set, visited + (name,))
+
+    def selection_cost(self, parent_type, selection_set, depth):
+        self.depth = max(self.depth, depth)
+        cost = 0
+        for field_parent, field in self.fields(parent_type, selection_set):
+            name = field.name.value
+            # Introspection is served from the schema
+            if name.startswith("__"):
+                continue
+            field_def = getattr(field_parent, "fields", {}).get(name)
+            if field_def is None:
+                continue
+
+            field_type = get_named_type(field_def.type)
+            weight = settings.GRAPHQL_LIMITS["WEIGHTS"].get(
+                f"{field_parent.name}.{name}", 0 if is_leaf_type(field_type) else 1
+            )
+            if field.selection_set:
+                size = self.size(field_parent, field, field_def)
+                cost += size * (weight + self.selection_cost(field_type, field.selection_set, depth + 1))
+            else:
+                cost += weight
+        return cost
+
+    def size(self, parent_type, field, field_def):
+        size_arguments = [name for name in SIZE_ARGUMENTS if name in field_def.args]
+        if size_arguments:
+            try:
+                arguments = get_argument_values(field_def.args, field.arguments, self.variables)
+            except GraphQLError:
+                arguments = {}
+            sizes = [arguments[name] for name in size_arguments if arguments.get(name) is not None]
+            if not sizes:
+                return settings.GRAPHQL_LIMITS["DEFAULT_PAGE_SIZE"]
+            return max(0, min(min(sizes), settings.GRAPHQL_LIMITS["MAX_PAGE_SIZE"]))
+
+        field_type = field_def.type.of_type if isinstance(field_def.type, GraphQLNonNull) else field_def.type
+        # The edges of a connection are bounded by the size of the connection field
+        if isinstance(field_type, GraphQLList) and not (
+            field.name.value == "edges" and parent_type.name.endswith("Connection")
+        ):
+            return settings.GRAPHQL_LIMITS["DEFAULT_LIST_SIZE"]
+        return 1
+
+
+def analyze(schema, document_ast, variable_values=None, operation_name=None):
+    """
+    The Analysis of an operation, None when it cannot be executed
+    """
+    operation = get_operation_ast(document_ast, operation_name)
+    if operation is None:
+        return None
+    try:
+        variables = get_variable_values(schema, operation.variable_definitions or [], variable_values or {})
+    except GraphQLError:
+        # Reported by the execution
+        return None
+    return Analysis(schema, document_ast, operation, variables)
+
+
+def limit_errors(analysis, spent=0):
+    """
+    The errors of an operation deeper than MAX_DEPTH or costing more than MAX_COST, if any, with the cost
+    `spent` by the previous operations of its request
+    """
+    limits = settings.GRAPHQL_LIMITS
+    if analysis.depth > limits["MAX_DEPTH"]:
+        return [
+            GraphQLError(
+                QUERY_TOO_DEEP_ERROR,
+                [analysis.operation],
+                extensions={"depth": analysis.depth, "maxDepth": limits["MAX_DEPTH"]},
+            )
+        ]
+    if spent + analysis.cost > limits["MAX_COST"]:
+        return [
+            GraphQLError(
+                QUERY_TOO_COMPLEX_ERROR,
+                [analysis.operation],
+                extensions={"cost": analysis.cost, "spent": spent, "maxCost": limits["MAX_COST"]},
+            )
+        ]
+    return []
+
+
+def execute_within_limits(schema, document_ast, *args, validation_errors=None, **kwargs):
+    """
+    Validates an operation, unless its validation_errors are given, then rejects it over the GRAPHQL_LIMITS
+    budgets before it touches the databases. The operations of a batch share the MAX_COST budget of their
+    request, the context.
+    """
+    if validation_errors is None and kwargs.pop("validate", True):
+        validation_errors = validate(schema, document_ast)
+    if validation_errors:
+        return ExecutionResult(errors=validation_errors, invalid=True)
+
+    if settings.GRAPHQL_LIMITS["ENABLED"]:
+        analysis = analyze(schema, document_ast, kwargs.get("variable_values"), kwargs.get("operation_name"))
+        if analysis is not None:
+            context = kwargs.get("context_value")
+            spent = getattr(context, "graphql_cost", 0)
+            errors = limit_errors(analysis, spent)
+            if errors:
+                return ExecutionResult(errors=errors, invalid=True)
+            if context is not None:
+                context.graphql_cost = spent + analysis.cost
+
+    return execute(schema, document_ast, *args, **kwargs)
+
+
+class LimitedBackend(GraphQLCoreBackend):
+    """
+    graphql-core backend checking the depth and cost of the operations, with the variables of the request
+    """
+
+    def document_from_string(self, schema, document_string):
+        # Compiled documents are executed as they are
+        if isinstance(document_string, GraphQLDocument):
+            return document_string
+
+        document = super().document_from_string(schema, document_string)
+        document.execute = partial(execute_within_limits, schema, document.document_ast, **self.execute_params)
+        return document
+
+    def compile(self, schema, document_string):
+        """
+        A document parsed and validated once, for the documents kept to be executed many times
+        """
+        document = super().document_from_string(schema, document_string)
+        document.execute = partial(
+            execute_within_limits,
+            schema,
+            document.document_ast,
+            validation_errors=validate(schema, document.document_ast),
+            **self.execute_params,
+        )
+        return document
@@ -0,0 +1,163 @@
+import heapq
+import json
+import logging
+import re
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from neomodel.util import Database
+from promise import is_thenable
+
+# Installs the managed cypher_query first, so that it is the one instrumented below
+import core.neo4j  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+OPERATION_NAME = re.compile(r"^\s*(?:query|mutation|subscription)\s+(\w+)")
+
+
+def operation_name_of(query):
+    """
+    The name of the first operation of a document, for requests which do not send an operationName
+    """
+    match = OPERATION_NAME.match(query or "")
+    return match.group(1) if match else "anonymous"
+
+
+class OperationStats:
+    """
+    The database statements and resolver timings of one GraphQL operation
+    """
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.statements = Counter()
+        self.db_time = 0.0
+        self.slowest = []
+        self.resolvers = defaultdict(lambda: [0, 0.0])
+        self.start = perf_counter()
+        self.duration = None
+
+    def add_statement(self, kind, statement, duration):
+        self.statements[kind] += 1
+        self.db_time += duration
+
+        entry = (duration, kind, " ".join(statement.split())[:500])
+        if len(self.slowest) < settings.GRAPHQL_INSTRUMENTATION["SLOWEST_STATEMENTS"]:
+            heapq.heappush(self.slowest, entry)
+        elif self.slowest and duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def add_resolver(self, field, duration):
+        timing = self.resolvers[field]
+        timing[0] += 1
+        timing[1] += duration
+
+    def as_dict(self):
+        return {
+            "operation": self.operation,
+            "durationMs": round((self.duration or perf_counter() - self.start) * 1000, 3),
+            "cypher": self.statements["cypher"],
+            "sql": self.statements["sql"],
+            "dbTimeMs": round(self.db_time * 1000, 3),
+            "slowest": [
+                {"kind": kind, "statement": statement, "durationMs": round(duration * 1000, 3)}
+                for duration, kind, statement in sorted(self.slowest, reverse=True)
+            ],
+            "resolvers": {
+                field: {"calls": calls, "durationMs": round(duration * 1000, 3)}
+                for field, (calls, duration) in sorted(self.resolvers.items(), key=lambda item: -item[1][1])
+            },
+        }
+
+    def log(self):
+        logger.info(json.dumps({"event": "graphql.operation", **self.as_dict()}))
+
+
+def current():
+    """
+    The stats of the operation being executed by the current thread, if any
+    """
+    return getattr(_local, "stats", None)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    stats = current()
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.add_statement("sql", sql, perf_counter() - start)
+
+
+def _instrument_cypher():
+    cypher_query = Database.cypher_query
+    if getattr(cypher_query, "instrumented", False):
+        return
+
+    def instrumented_cypher_query(self, query, *args, **kwargs):
+        stats = current()
+        if stats is None:
+            return cypher_query(self, query, *args, **kwargs)
+        start = perf_counter()
+        try:
+            return cypher_query(self, query, *args, **kwargs)
+        finally:
+            stats.add_statement("cypher", query, perf_counter() - start)
+
+    instrumented_cypher_query.instrumented = True
+    Database.cypher_query = instrumented_cypher_query
+
+
+_instrument_cypher()
+
+
+@contextmanager
+def capture(operation):
+    """
+    Records the statements run by the current thread while executing an operation
+    """
+    previous = current()
+    _local.stats = stats = OperationStats(operation)
+    try:
+        with connection.execute_wrapper(_sql_wrapper):
+            yield stats
+    finally:
+        stats.duration = perf_counter() - stats.start
+        _local.stats = previous
+
+
+class InstrumentationMiddleware:
+    """
+    Times the resolvers of the operation being captured, by parent type and field name
+    """
+
+    def resolve(self, next, root, info, **args):
+        stats = current()
+        if stats is None:
+            return next(root, info, **args)
+
+        field = f"{info.parent_type.name}.{info.field_name}"
+        start = perf_counter()
+        result = next(root, info, **args)
+
+        if not is_thenable(result):
+            stats.add_resolver(field, perf_counter() - start)
+            return result
+
+        def resolved(value):
+            stats.add_resolver(field, perf_counter() - start)
+            return value
+
+        def rejected(error):
+            stats.add_resolver(field, perf_counter() - start)
+            raise error
+
+        return result.then(resolved, rejected)
@@ -0,0 +1,129 @@
+import ipaddress
+import os
+from time import perf_counter
+
+import api.errors
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from graphql.type import GraphQLEnumType, GraphQLScalarType, get_named_type
+from neomodel import db
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from promise import is_thenable
+
+# Known error messages, other messages are counted together to keep the number of series bounded
+ERROR_MESSAGES = {value for name, value in vars(api.errors).items() if name.isupper() and isinstance(value, str)}
+
+RESOLVER_DURATION = Histogram(
+    "graphql_resolver_duration_seconds",
+    "Latency of the root fields and of the fields with a custom resolver",
+    ["field"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+OPERATIONS = Counter("graphql_operations_total", "Executed GraphQL operations")
+ERRORS = Counter("graphql_errors_total", "Errors returned by GraphQL operations", ["message"])
+FIELD_CACHE_REQUESTS = Counter(
+    "graphql_field_cache_requests_total",
+    "Lookups of the field cache by field and result",
+    ["field", "result"],
+)
+DOCUMENT_CACHE_REQUESTS = Counter(
+    "graphql_document_cache_requests_total",
+    "Lookups of the parsed and validated documents by cache and result",
+    ["cache", "result"],
+)
+NEO4J_RETRIES = Counter("neo4j_retries_total", "Statements retried after an error", ["error"])
+NEO4J_POOL_SIZE = Gauge(
+    "neo4j_pool_max_connections",
+    "Maximum number of connections of the Neo4j driver pool, per server",
+    multiprocess_mode="livesum",
+)
+NEO4J_CONNECTIONS = Gauge(
+    "neo4j_pool_connections",
+    "Connections of the Neo4j driver pools",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+
+def is_leaf(info):
+    return isinstance(get_named_type(info.return_type), (GraphQLScalarType, GraphQLEnumType))
+
+
+class MetricsMiddleware:
+    """
+    Observes the latency of the root fields and of the object fields, by parent type and field name.
+    Scalar fields of nested objects are mostly attribute lookups and are skipped to keep the overhead low.
+    """
+
+    def resolve(self, next, root, info, **args):
+        if root is not None and is_leaf(info):
+            return next(root, info, **args)
+
+        histogram = RESOLVER_DURATION.labels(f"{info.parent_type.name}.{info.field_name}")
+        start = perf_counter()
+        result = next(root, info, **args)
+
+        if not is_thenable(result):
+            histogram.observe(perf_counter() - start)
+            return result
+
+        def resolved(value):
+            histogram.observe(perf_counter() - start)
+            return value
+
+        def rejected(error):
+            histogram.observe(perf_counter() - start)
+            raise error
+
+        return result.then(resolved, rejected)
+
+
+def observe_result(execution_result):
+    """
+    Counts an executed operation and its errors, and samples the Neo4j pool of the process
+    """
+    OPERATIONS.inc()
+    for error in execution_result.errors or ():
+        message = str(error)
+        ERRORS.labels(message if message in ERROR_MESSAGES else "other").inc()
+
+    pool = getattr(getattr(db, "driver", None), "_pool", None)
+    if pool is not None:
+        with pool.lock:
+            connections = [
+                connection for address_connections in pool.connections.values() for connection in address_connections
+            ]
+            in_use = sum(1 for connection in connections if connection.in_use)
+        NEO4J_POOL_SIZE.set(pool.pool_config.max_connection_pool_size)
+        NEO4J_CONNECTIONS.labels("in_use").set(in_use)
+        NEO4J_CONNECTIONS.labels("idle").set(len(connections) - in_use)
+
+
+def metrics_view(request):
+    """
+    Exposes the metrics, aggregated over the worker processes when PROMETHEUS_MULTIPROC_DIR is set,
+    to the clients of the METRICS allowed networks
+    """
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return HttpResponseForbidden()
+    networks = (ipaddress.ip_network(network.strip(), strict=False) for network in settings.METRICS["ALLOWED_IPS"])
+    if not any(address in network for network in networks):
+        return HttpResponseForbidden()
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
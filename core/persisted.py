@@ -0,0 +1,95 @@
+import hashlib
+import json
+import threading
+
+from api.errors import (
+    PERSISTED_QUERY_HASH_MISMATCH_ERROR,
+    PERSISTED_QUERY_NOT_ALLOWED_ERROR,
+    PERSISTED_QUERY_NOT_FOUND_ERROR,
+    PERSISTED_QUERY_NOT_SUPPORTED_ERROR,
+)
+from django.conf import settings
+from graphql.error import GraphQLSyntaxError
+
+from core.lru import LRUCache
+from core.metrics import DOCUMENT_CACHE_REQUESTS
+
+
+class PersistedQueryError(Exception):
+    pass
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueries:
+    """
+    Automatic persisted queries: clients send the SHA-256 hash of a query in the `persistedQuery` extension,
+    and the query itself only after a PersistedQueryNotFound error.
+
+    Documents are parsed and validated once, and kept in an LRU by hash. With an ALLOW_LIST file, only its
+    queries are executed, whether they are sent by hash or in full.
+    """
+
+    def __init__(self):
+        self._documents = None
+        self._allow_list = None
+        self._lock = threading.Lock()
+
+    @property
+    def documents(self):
+        if self._documents is None:
+            self._documents = LRUCache(settings.PERSISTED_QUERIES["MAX_SIZE"])
+        return self._documents
+
+    def allow_list(self):
+        """
+        The allowed queries by hash, None when every query is allowed
+        """
+        path = settings.PERSISTED_QUERIES["ALLOW_LIST"]
+        if not path:
+            return None
+        with self._lock:
+            if self._allow_list is None:
+                with open(path) as file:
+                    self._allow_list = json.load(file)
+            return self._allow_list
+
+    def document(self, backend, schema, query, extensions):
+        """
+        The compiled document of a request, None for the requests which are not persisted
+        """
+        persisted = (extensions or {}).get("persistedQuery")
+        allow_list = self.allow_list()
+        if not persisted:
+            if allow_list is None or not query:
+                return None
+            persisted = {"version": 1, "sha256Hash": query_hash(query)}
+
+        if persisted.get("version") != 1 or not isinstance(persisted.get("sha256Hash"), str):
+            raise PersistedQueryError(PERSISTED_QUERY_NOT_SUPPORTED_ERROR)
+        sha256_hash = persisted["sha256Hash"]
+        if query and query_hash(query) != sha256_hash:
+            raise PersistedQueryError(PERSISTED_QUERY_HASH_MISMATCH_ERROR)
+
+        if allow_list is not None:
+            if sha256_hash not in allow_list:
+                raise PersistedQueryError(PERSISTED_QUERY_NOT_ALLOWED_ERROR)
+            query = allow_list[sha256_hash]
+
+        document = self.documents.get(sha256_hash)
+        DOCUMENT_CACHE_REQUESTS.labels("persisted", "miss" if document is None else "hit").inc()
+        if document is None:
+            if not query:
+                raise PersistedQueryError(PERSISTED_QUERY_NOT_FOUND_ERROR)
+            try:
+                document = backend.compile(schema, query)
+            except GraphQLSyntaxError:
+                # Reported by the regular execution of the query
+                return None
+            self.documents.set(sha256_hash, document)
+        return document
+
+
+persisted_queries = PersistedQueries()
@@ -166,9 +166,167 @@ GRAPHENE = {
     "SCHEMA": "core.schema.schema",
     "MIDDLEWARE": [
         "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        "core.instrumentation.InstrumentationMiddleware",
+        "core.metrics.MetricsMiddleware",
     ],
 }
 
+# Prometheus metrics are exposed on /metrics by core.metrics. Set PROMETHEUS_MULTIPROC_DIR to a
+# directory shared by the gunicorn workers to aggregate their metrics, see gunicorn.conf.py.
+# Only the addresses and networks of ALLOWED_IPS, comma separated in METRICS_ALLOWED_IPS, can
+# read them: the scraper must reach the workers directly, not through a proxy.
+METRICS = {
+    "ALLOWED_IPS": os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(","),
+}
+
+# Neo4j driver shared by the threads of each process, see core/neo4j.py. The pool size is per
+# process and per server. Transient errors are retried MAX_RETRIES times with an exponential
+# backoff starting at RETRY_DELAY seconds, and lost connections too for reads. Reads routed to the
+# readers of a cluster wait for the last write of their thread, through its bookmark.
+NEO4J = {
+    "MAX_CONNECTION_POOL_SIZE": int(os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", 50)),
+    "MAX_CONNECTION_LIFETIME": 3600,
+    "CONNECTION_ACQUISITION_TIMEOUT": 60,
+    "CONNECTION_TIMEOUT": 30,
+    "KEEP_ALIVE": True,
+    "FETCH_SIZE": 1000,
+    "MAX_RETRIES": 3,
+    "RETRY_DELAY": 0.1,
+}
+
+# Set by core/asgi.py. The GraphQL operations then run in a pool of THREADS threads per worker,
+# while the event loop keeps accepting requests. More threads than Neo4j connections would only
+# wait on the driver pool.
+ASGI = {
+    "ENABLED": os.getenv("DJANGO_ASGI") == "True",
+    "THREADS": int(os.getenv("ASGI_THREADS", NEO4J["MAX_CONNECTION_POOL_SIZE"])),
+}
+
+# Operations nested deeper than MAX_DEPTH or with an estimated cost over MAX_COST are rejected
+# before execution, see core/complexity.py. Objects cost 1 and scalars 0 unless set in WEIGHTS, by
+# "Type.field", and fields with selections cost that much for each item of their first/limit arguments.
+GRAPHQL_LIMITS = {
+    "ENABLED": True,
+    "MAX_DEPTH": 10,
+    "MAX_COST": 5000,
+    # Page size of the fields accepting first/limit arguments when none is given, and largest page
+    # returned whatever the arguments, see paginate
+    "DEFAULT_PAGE_SIZE": 100,
+    "MAX_PAGE_SIZE": 100,
+    # Items of the other lists, such as the hashtags of a tweet
+    "DEFAULT_LIST_SIZE": 10,
+    "WEIGHTS": {
+        "Query.myFeed": 5,
+        "Query.myFeedConnection": 5,
+        "Query.searchTweets": 10,
+    },
+}
+
+# Automatic persisted queries, see core/persisted.py. With ALLOW_LIST set to a JSON file of
+# {sha256: query}, written by the persisted_queries command, only those queries are executed. The file
+# must be written again from the operations of the clients whenever they change, any other one is rejected.
+PERSISTED_QUERIES = {
+    "ENABLED": True,
+    "MAX_SIZE": 1000,
+    "ALLOW_LIST": os.getenv("PERSISTED_QUERIES_ALLOW_LIST"),
+}
+
+# LRU of the parsed and validated documents of the GraphQL view, keyed by query text. Longer
+# queries than MAX_QUERY_LENGTH characters are not cached.
+DOCUMENT_CACHE = {
+    "ENABLED": True,
+    "MAX_SIZE": 1000,
+    "MAX_QUERY_LENGTH": 100000,
+}
+
+# A JSON array POSTed to the GraphQL view is a batch of operations, executed in order with the same
+# request: authentication, DataLoaders and database connections are shared, and so is the MAX_COST
+# budget of GRAPHQL_LIMITS. Larger batches than MAX_OPERATIONS are rejected.
+GRAPHQL_BATCH = {
+    "ENABLED": True,
+    "MAX_OPERATIONS": 10,
+}
+
+# Statements count, database time, slowest statements and resolver timings of every operation,
+# logged by core.instrumentation and returned in the response extensions when EXTENSIONS is set.
+# The extensions show the statements to the clients, so they are only returned in DEBUG.
+GRAPHQL_INSTRUMENTATION = {
+    "ENABLED": True,
+    "EXTENSIONS": DEBUG,
+    "SLOWEST_STATEMENTS": 5,
+}
+
+# Materialized home timelines: posts are pushed to followers on write, except for accounts
+# with more than FANOUT_LIMIT followers whose posts are merged when the feed is read. Accounts
+# dropping back under FANOUT_LIMIT followers have their latest posts copied into the timelines.
+# Timelines are trimmed back to MAX_LENGTH once they grow past TRIM_AT entries.
+TIMELINE = {
+    "MAX_LENGTH": 800,
+    "TRIM_AT": 880,
+    "FANOUT_LIMIT": 10000,
+}
+
+# Likes, retweets and comments counters are buffered in process and flushed in batches every
+# FLUSH_INTERVAL seconds by a thread of each process, or as soon as MAX_PENDING nodes have deltas.
+# Without FLUSH_THREAD, the writes flush the deltas once the oldest is FLUSH_INTERVAL seconds old.
+# A FLUSH_INTERVAL of 0 writes every delta through.
+COUNTERS = {
+    "FLUSH_INTERVAL": 1.0,
+    "FLUSH_THREAD": True,
+    "MAX_PENDING": 1000,
+}
+
+# Trending hashtags are counted in process over the last hour and the last day, and rebuilt from
+# the database every RESYNC_INTERVAL seconds to add the tweets of the other processes.
+# The TOP_K hashtags of each window are kept up to date.
+TRENDING = {
+    "RESYNC_INTERVAL": 60,
+    "TOP_K": 50,
+}
+
+# Hashtags autocompletion from an in process prefix tree keeping the TOP_K most used tags of every
+# prefix, rebuilt from the database every REBUILD_INTERVAL seconds.
+AUTOCOMPLETE = {
+    "REBUILD_INTERVAL": 300,
+    "TOP_K": 10,
+}
+
+# Full-text search of the tweets and comments. Indexes are named PREFIX_<timestamp> and created by
+# the fulltext_index command. The relevance of a tweet halves every HALF_LIFE seconds of age when
+# the recency boost is on, and only the CANDIDATES most relevant tweets are ranked. Searches return
+# at most MAX_LIMIT tweets per page.
+FULLTEXT = {
+    "PREFIX": "posts",
+    "HALF_LIFE": 3 * 24 * 60 * 60,
+    "CANDIDATES": 1000,
+    "MAX_LIMIT": 50,
+}
+
+# Cache of the resolvers which do not depend on the user, invalidated when the hashtags or users they
+# depend on change, see core/cache.py. BACKEND is "local" for an in process LRU of MAX_SIZE entries
+# or "django" for the CACHE alias of the cache framework. A TTL of 0 disables the cache.
+FIELD_CACHE = {
+    "BACKEND": "local",
+    "MAX_SIZE": 10000,
+    "TTL": 10,
+    "CACHE": "default",
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core.instrumentation": {
+            "handlers": ["console"],
+            "level": os.getenv("GRAPHQL_INSTRUMENTATION_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 GRAPHQL_JWT = {
     "JWT_VERIFY_EXPIRATION": True,
     "JWT_EXPIRATION_DELTA": timedelta(minutes=120),
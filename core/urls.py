@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+
+from core.metrics import metrics_view
+from core.views import GraphQLView, run_in_thread
+
+graphql_view = csrf_exempt(GraphQLView.as_view(graphiql=True))
+if settings.ASGI["ENABLED"]:
+    graphql_view = run_in_thread(graphql_view)
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("graphql/", graphql_view),
+    path("metrics", metrics_view),
 ]
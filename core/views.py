@@ -0,0 +1,235 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from api.errors import PERSISTED_QUERY_NOT_FOUND_ERROR, PERSISTED_QUERY_NOT_SUPPORTED_ERROR
+from api.schema.loaders import clear_loaders
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.http.response import HttpResponseBadRequest
+from graphene_django import views
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.utils.utils import set_rollback
+from graphql.backend.base import GraphQLDocument
+from graphql.error import GraphQLSyntaxError
+
+from core.complexity import LimitedBackend
+from core.instrumentation import capture, operation_name_of
+from core.lru import LRUCache
+from core.metrics import DOCUMENT_CACHE_REQUESTS, observe_result
+from core.persisted import PersistedQueryError, persisted_queries
+
+
+class GraphQLView(views.GraphQLView):
+    """
+    GraphQL view recording the database statements and resolver timings of each operation.
+    They are logged and returned in the `instrumentation` key of the response extensions.
+    Operations and their errors are counted in the Prometheus metrics.
+
+    Requests with a `persistedQuery` extension are served from the compiled documents of core.persisted,
+    the other queries from an LRU of their parsed and validated documents keyed by query text.
+
+    A JSON array of operations is executed as a batch, in order and with the same request: the user is
+    authenticated once, the DataLoaders are shared except across mutations, and the operations share
+    the MAX_COST budget of a request.
+    """
+
+    _documents = None
+
+    def __init__(self, backend=None, **kwargs):
+        # The backend compiles the documents kept by the caches
+        super().__init__(backend=backend or LimitedBackend(), **kwargs)
+
+    @classmethod
+    def documents(cls):
+        if cls._documents is None:
+            cls._documents = LRUCache(settings.DOCUMENT_CACHE["MAX_SIZE"])
+        return cls._documents
+
+    def get_document(self, request, query):
+        """
+        The compiled document of a query text, the text itself when it is not cached
+        """
+        if not settings.DOCUMENT_CACHE["ENABLED"] or len(query) > settings.DOCUMENT_CACHE["MAX_QUERY_LENGTH"]:
+            return query
+
+        documents = self.documents()
+        document = documents.get(query)
+        DOCUMENT_CACHE_REQUESTS.labels("documents", "miss" if document is None else "hit").inc()
+        if document is None:
+            try:
+                document = self.get_backend(request).compile(self.schema, query)
+            except GraphQLSyntaxError:
+                # Reported by the regular execution of the query
+                return query
+            documents.set(query, document)
+        return document
+
+    def parse_body(self, request):
+        if not settings.GRAPHQL_BATCH["ENABLED"] or self.get_content_type(request) != "application/json":
+            return super().parse_body(request)
+
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+        except (UnicodeDecodeError, ValueError):
+            raise views.HttpError(HttpResponseBadRequest("POST body sent invalid JSON."))
+
+        self.batch = isinstance(data, list)
+        if self.batch:
+            if not data:
+                raise views.HttpError(HttpResponseBadRequest("Received an empty list in the batch request."))
+            if len(data) > settings.GRAPHQL_BATCH["MAX_OPERATIONS"]:
+                raise views.HttpError(
+                    HttpResponseBadRequest(
+                        f"Batches are limited to {settings.GRAPHQL_BATCH['MAX_OPERATIONS']} operations."
+                    )
+                )
+            if not all(isinstance(entry, dict) for entry in data):
+                raise views.HttpError(HttpResponseBadRequest("Batch requests should receive a list of objects."))
+        elif not isinstance(data, dict):
+            raise views.HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+        return data
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super().get_graphql_params(request, data)
+        if not settings.PERSISTED_QUERIES["ENABLED"]:
+            return query and self.get_document(request, query), variables, operation_name, id
+
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise views.HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        try:
+            document = persisted_queries.document(self.get_backend(request), self.schema, query, extensions)
+        except PersistedQueryError as error:
+            # Clients send the query after these errors, as for Apollo Server
+            retry = str(error) in (PERSISTED_QUERY_NOT_FOUND_ERROR, PERSISTED_QUERY_NOT_SUPPORTED_ERROR)
+            raise views.HttpError(HttpResponse(status=200) if retry else HttpResponseBadRequest(), str(error))
+        if document is not None:
+            return document, variables, operation_name, id
+        return query and self.get_document(request, query), variables, operation_name, id
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if not settings.GRAPHQL_INSTRUMENTATION["ENABLED"] or not query:
+            execution_result = super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        else:
+            with capture(operation_name or operation_name_of(getattr(query, "document_string", query))) as stats:
+                execution_result = super().execute_graphql_request(
+                    request, data, query, variables, operation_name, show_graphiql
+                )
+
+            if execution_result is not None:
+                stats.log()
+                if settings.GRAPHQL_INSTRUMENTATION["EXTENSIONS"]:
+                    execution_result.extensions["instrumentation"] = stats.as_dict()
+
+        if execution_result is not None:
+            observe_result(execution_result)
+        return execution_result
+
+    def get_response(self, request, data, show_graphiql=False):
+        if not self.batch:
+            return self.get_operation_response(request, data, show_graphiql)
+
+        # The errors of an operation of a batch are returned in its response instead of failing the batch
+        setattr(request, MUTATION_ERRORS_FLAG, False)
+        try:
+            return self.get_operation_response(request, data, show_graphiql)
+        except views.HttpError as error:
+            status_code = error.response.status_code
+            response = {"errors": [self.format_error(error)], "id": data.get("id"), "status": status_code}
+            return self.json_encode(request, response), status_code
+
+    def get_operation_response(self, request, data, show_graphiql=False):
+        # Same as the parent get_response, with the extensions added to the response
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        # The nodes loaded by the other operations of a batch may be changed by a mutation
+        mutation = self.batch and not (
+            isinstance(query, GraphQLDocument) and query.get_operation_type(operation_name) == "query"
+        )
+        if mutation:
+            clear_loaders(request)
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+
+        if mutation:
+            clear_loaders(request)
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                set_rollback()
+                response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+            if execution_result.invalid:
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """
+    The thread pool of the process, created on first use so that it is not shared with forked workers
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.ASGI["THREADS"], thread_name_prefix="graphql")
+        return _executor
+
+
+def _serve(view, request, *args, **kwargs):
+    # Django only closes the connections of the thread finishing the request, not the ones of the pool
+    close_old_connections()
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def run_in_thread(view):
+    """
+    Async view running a sync view in the thread pool, so that the event loop keeps accepting requests
+    while the operations wait on Neo4j and Postgres. An operation runs in a single thread, which keeps
+    its neomodel transaction, its DataLoaders batching and its instrumentation.
+    """
+
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor(), partial(_serve, view, request, *args, **kwargs))
+
+    async_view.csrf_exempt = getattr(view, "csrf_exempt", False)
+    return async_view
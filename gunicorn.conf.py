@@ -0,0 +1,31 @@
+import glob
+import logging
+import os
+
+from prometheus_client import multiprocess
+
+# The workers share their metrics through files in PROMETHEUS_MULTIPROC_DIR, see core/metrics.py
+
+
+def on_starting(server):
+    # Metrics of a previous run would be added to the new ones
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for file in glob.glob(os.path.join(path, "*.db")):
+            os.remove(file)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    # Builds the hashtags autocompletion index before the worker serves requests
+    from api.models.autocomplete import hashtag_index
+
+    try:
+        hashtag_index.rebuild()
+    except Exception:
+        logging.getLogger(__name__).exception("Could not build the hashtags index, it will be built on first use")
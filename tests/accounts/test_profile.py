@@ -1,6 +1,8 @@
 import pytest
 from api.errors import USER_NOT_FOUND_ERROR
 from dateutil import parser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from graphene_django.utils.testing import graphql_query
 from tests import queries
 
@@ -174,6 +176,31 @@ class TestProfile:
         assert len(response["data"]["myProfile"]["followers"]) == 3
         assert response["data"]["myProfile"]["followers"][0]["username"] == "follower__7"
 
+    def test_followers_accounts_are_batched(self, create_user_node):
+        user = create_user_node()
+
+        def count_queries(nb_followers):
+            for i in range(0, nb_followers):
+                follower = create_user_node()
+                res_add_follower = graphql_query(
+                    queries.follow,
+                    variables={"uid": str(user["node"].uid)},
+                    headers={"HTTP_AUTHORIZATION": f"JWT {follower['token']}"},
+                ).json()
+                assert "errors" not in res_add_follower
+
+            with CaptureQueriesContext(connection) as context:
+                response = graphql_query(
+                    queries.my_followers,
+                    headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+                ).json()
+            print(response)
+            assert "errors" not in response
+            return len(context.captured_queries)
+
+        # the number of sql queries does not depend on the number of followers
+        assert count_queries(2) == count_queries(4)
+
     def test_my_subs(self, create_user_node):
         user = create_user_node()
         followed_user = create_user_node()
@@ -365,58 +392,6 @@ class TestProfile:
         assert response["data"]["userProfile"]["content"][0]["__typename"] == "CommentType"
         assert response["data"]["userProfile"]["content"][-1]["__typename"] == "TweetType"
 
-    def test_my_feed(self, faker, create_user_node, create_node):
-        user = create_user_node()
-        to_follow = create_user_node(verified=True)
-
-        for i in range(0, 2):
-            content = faker.sentence()
-            resp = graphql_query(
-                queries.tweet,
-                variables={"content": content},
-                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
-            ).json()
-            assert "errors" not in resp
-
-        for i in range(0, 2):
-            tweet = create_node("TweetType")
-            resp = graphql_query(
-                queries.retweet,
-                variables={"uid": tweet.uid},
-                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
-            ).json()
-            assert "errors" not in resp
-
-        for i in range(0, 2):
-            tweet = create_node("TweetType")
-            comment = faker.sentence()
-            resp = graphql_query(
-                queries.comment,
-                variables={"uid": tweet.uid, "type": "TweetType", "content": comment},
-                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
-            ).json()
-            assert "errors" not in resp
-
-        resp = graphql_query(
-            queries.follow,
-            variables={"uid": str(to_follow["node"].uid)},
-            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
-        )
-        assert "errors" not in resp
-
-        response = graphql_query(
-            queries.my_feed,
-            variables={"skip": 0, "limit": 11},
-            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
-        ).json()
-        print(response)
-
-        assert "errors" not in response
-        assert len(response["data"]["myFeed"]) == 6
-        assert parser.parse(response["data"]["myFeed"][0]["created"]) > parser.parse(
-            response["data"]["myFeed"][-1]["created"]
-        )
-
     def test_tag_search(self, faker, create_user_node):
         my_token = create_user_node(verified=True, token=True)
         tweets_tagged = 3
@@ -0,0 +1,64 @@
+import sys
+
+from api.models import HashtagNode
+from api.models.autocomplete import HashtagIndex, Suggestion
+
+autocomplete_module = sys.modules["api.models.autocomplete"]
+
+
+class FakeDatabase:
+    """
+    Returns the hashtags of `counts`, most used first
+    """
+
+    def __init__(self, counts):
+        self.counts = counts
+        self.queries = 0
+
+    def cypher_query(self, query, params=None):
+        self.queries += 1
+        return sorted(self.counts.items(), key=lambda item: -item[1]), None
+
+
+class TestHashtagIndex:
+    def test_normalize(self):
+        assert HashtagNode.normalize(" #Django ") == "django"
+        assert HashtagNode.normalize("# Neo4j") == "neo4j"
+        assert HashtagNode.normalize("#") == ""
+
+    def test_complete(self, monkeypatch):
+        monkeypatch.setattr(autocomplete_module, "db", FakeDatabase({"django": 5, "djangorest": 3, "dgraph": 1}))
+        index = HashtagIndex()
+
+        assert index.complete("dj") == [Suggestion("django", 5), Suggestion("djangorest", 3)]
+        assert index.complete("d", limit=2) == [Suggestion("django", 5), Suggestion("djangorest", 3)]
+        assert index.complete("djangor") == [Suggestion("djangorest", 3)]
+        assert index.complete("") == [Suggestion("django", 5), Suggestion("djangorest", 3), Suggestion("dgraph", 1)]
+        assert index.complete("x") == []
+        assert index.complete("djangox") == []
+
+    def test_added_tags_are_promoted(self, monkeypatch):
+        database = FakeDatabase({"django": 2, "dgraph": 1})
+        monkeypatch.setattr(autocomplete_module, "db", database)
+        index = HashtagIndex()
+
+        # Not indexed before the tree is built
+        index.add(["dgraph"])
+        assert index.complete("d") == [Suggestion("django", 2), Suggestion("dgraph", 1)]
+
+        index.add(["dgraph", "dart"])
+        index.add(["dgraph"])
+        assert index.complete("d") == [Suggestion("dgraph", 3), Suggestion("django", 2), Suggestion("dart", 1)]
+        assert index.complete("da") == [Suggestion("dart", 1)]
+        assert database.queries == 1
+
+    def test_top_k(self, monkeypatch, settings):
+        settings.AUTOCOMPLETE = {**settings.AUTOCOMPLETE, "TOP_K": 2}
+        monkeypatch.setattr(autocomplete_module, "db", FakeDatabase({"django": 5, "djangorest": 3, "dgraph": 1}))
+        index = HashtagIndex()
+
+        assert index.complete("d", limit=10) == [Suggestion("django", 5), Suggestion("djangorest", 3)]
+        assert index.complete("dg") == [Suggestion("dgraph", 1)]
+
+        index.add(["dgraph"] * 4)
+        assert index.complete("d") == [Suggestion("django", 5), Suggestion("dgraph", 5)]
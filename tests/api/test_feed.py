@@ -0,0 +1,128 @@
+import pytest
+from dateutil import parser
+from graphene_django.utils.testing import graphql_query
+from tests import queries
+
+
+@pytest.mark.django_db
+class TestFeed:
+    def test_my_feed(self, faker, create_user_node, create_node):
+        user = create_user_node()
+        to_follow = create_user_node(verified=True)
+
+        for i in range(0, 2):
+            content = faker.sentence()
+            resp = graphql_query(
+                queries.tweet,
+                variables={"content": content},
+                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
+            ).json()
+            assert "errors" not in resp
+
+        for i in range(0, 2):
+            tweet = create_node("TweetType")
+            resp = graphql_query(
+                queries.retweet,
+                variables={"uid": tweet.uid},
+                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
+            ).json()
+            assert "errors" not in resp
+
+        for i in range(0, 2):
+            tweet = create_node("TweetType")
+            comment = faker.sentence()
+            resp = graphql_query(
+                queries.comment,
+                variables={"uid": tweet.uid, "type": "TweetType", "content": comment},
+                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
+            ).json()
+            assert "errors" not in resp
+
+        resp = graphql_query(
+            queries.follow,
+            variables={"uid": str(to_follow["node"].uid)},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        )
+        assert "errors" not in resp
+
+        response = graphql_query(
+            queries.my_feed,
+            variables={"skip": 0, "limit": 11},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        print(response)
+
+        assert "errors" not in response
+        assert len(response["data"]["myFeed"]) == 6
+        assert parser.parse(response["data"]["myFeed"][0]["created"]) > parser.parse(
+            response["data"]["myFeed"][-1]["created"]
+        )
+
+    def test_feed_fan_out(self, faker, create_user_node):
+        user = create_user_node()
+        to_follow = create_user_node(verified=True)
+
+        resp = graphql_query(
+            queries.follow,
+            variables={"uid": str(to_follow["node"].uid)},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        assert "errors" not in resp
+
+        for i in range(0, 3):
+            resp = graphql_query(
+                queries.tweet,
+                variables={"content": f"tweet {i}"},
+                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
+            ).json()
+            assert "errors" not in resp
+
+        response = graphql_query(
+            queries.my_feed,
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        print(response)
+        assert "errors" not in response
+        assert len(response["data"]["myFeed"]) == 3
+        assert response["data"]["myFeed"][0]["content"] == "tweet 2"
+
+        resp = graphql_query(
+            queries.unfollow,
+            variables={"uid": str(to_follow["node"].uid)},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        assert "errors" not in resp
+
+        response = graphql_query(
+            queries.my_feed,
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        print(response)
+        assert "errors" not in response
+        assert response["data"]["myFeed"] == []
+
+    def test_feed_across_fan_out_limit(self, settings, create_user_node):
+        settings.TIMELINE = {**settings.TIMELINE, "FANOUT_LIMIT": 2}
+        author = create_user_node(verified=True)
+        user, other = create_user_node(), create_user_node()
+
+        def post(user, query, **variables):
+            response = graphql_query(
+                query, variables=variables, headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"}
+            ).json()
+            assert "errors" not in response
+            return response
+
+        def feed():
+            return [tweet["content"] for tweet in post(user, queries.my_feed)["data"]["myFeed"]]
+
+        post(user, queries.follow, uid=str(author["node"].uid))
+        post(author, queries.tweet, content="fanned out")
+        # Crossing the limit upwards, the fanned out tweet is in both branches of the feed
+        post(other, queries.follow, uid=str(author["node"].uid))
+        post(author, queries.tweet, content="merged on read")
+        assert feed() == ["merged on read", "fanned out"]
+
+        # Crossing it downwards, the tweets merged on read are copied into the timelines
+        post(other, queries.unfollow, uid=str(author["node"].uid))
+        assert feed() == ["merged on read", "fanned out"]
@@ -0,0 +1,154 @@
+import api.graph.schema
+import pytest
+from api.graph.plans import db_hits, operators, regressions, summarize
+from api.graph.schema import CreateConstraint, CreateIndex, CreateRelationshipIndex, load_migrations, migrate
+from api.graph.statements import SAMPLE_UID, capture, registered_calls, registered_statements
+
+# Profiled plan of a label scan filtered then sorted
+PLAN = {
+    "operatorType": "ProduceResults@slotted",
+    "dbHits": 0,
+    "children": [
+        {
+            "operatorType": "Sort@slotted",
+            "dbHits": 0,
+            "children": [
+                {
+                    "operatorType": "Filter@slotted",
+                    "args": {"Details": "n.created > $since"},
+                    "dbHits": 20,
+                    "children": [
+                        {"operatorType": "NodeByLabelScan@slotted", "args": {"Details": "n:TweetNode"}, "dbHits": 11},
+                    ],
+                },
+            ],
+        },
+    ],
+}
+
+
+class FakeDatabase:
+    """
+    A Neo4j server of a given version with the `applied` migrations, recording the other statements
+    """
+
+    def __init__(self, version, applied=()):
+        self.version = version
+        self.applied = list(applied)
+        self.statements = []
+
+    def cypher_query(self, query, params=None):
+        if "dbms.components" in query:
+            return [[self.version]], None
+        if query.startswith("match (m:GraphMigration)"):
+            return [[name] for name in self.applied], None
+        self.statements.append(query)
+        return [], None
+
+
+class TestMigrations:
+    def test_operations_statements(self):
+        assert CreateConstraint("UserNode", "uid").statement() == (
+            "create constraint usernode_uid_unique if not exists on (n:UserNode) assert n.uid is unique"
+        )
+        assert CreateIndex("TweetNode", "created").statement() == (
+            "create index tweetnode_created if not exists for (n:TweetNode) on (n.created)"
+        )
+        assert CreateRelationshipIndex("LIKES", "date").statement() == (
+            "create index likes_date if not exists for ()-[r:LIKES]-() on (r.date)"
+        )
+
+    def test_load_migrations(self):
+        migrations = load_migrations()
+        names = [name for name, operations in migrations]
+        assert names[0] == "0001_initial"
+        assert names == sorted(names)
+
+        operation_names = [operation.name for name, operations in migrations for operation in operations]
+        assert len(operation_names) == len(set(operation_names))
+
+    def test_migrate(self, monkeypatch):
+        database = FakeDatabase("4.4.12")
+        monkeypatch.setattr(api.graph.schema, "db", database)
+
+        migrate(log=lambda message: None)
+        operations = [operation for name, operations in load_migrations() for operation in operations]
+        assert database.statements[: len(operations)] == [operation.statement() for operation in operations]
+        assert database.statements[len(operations)].startswith("merge (m:GraphMigration")
+
+        # Applied migrations are not run again
+        database = FakeDatabase("4.4.12", applied=[name for name, operations in load_migrations()])
+        monkeypatch.setattr(api.graph.schema, "db", database)
+        migrate(log=lambda message: None)
+        assert database.statements == []
+
+    def test_migrate_skips_unsupported_operations(self, monkeypatch):
+        database = FakeDatabase("4.1.0-enterprise")
+        monkeypatch.setattr(api.graph.schema, "db", database)
+        messages = []
+
+        migrate(log=messages.append)
+        assert not any("create index likes_date" in statement for statement in database.statements)
+        assert "create constraint usernode_uid_unique" in database.statements[0]
+        # Recorded once the server supports every operation
+        assert not any(statement.startswith("merge (m:GraphMigration") for statement in database.statements)
+        assert "0001_initial: 7 operations skipped, not recorded" in messages
+
+
+class TestPlans:
+    def test_db_hits(self):
+        assert db_hits(PLAN) == 31
+        assert db_hits({"operatorType": "EmptyResult"}) == 0
+
+    def test_operators(self):
+        assert list(operators(PLAN)) == [
+            ("ProduceResults", ""),
+            ("Sort", ""),
+            ("Filter", "n.created > $since"),
+            ("NodeByLabelScan", "n:TweetNode"),
+        ]
+
+    def test_summarize(self):
+        assert summarize(PLAN) == {
+            "dbHits": 31,
+            "operators": ["Filter", "NodeByLabelScan", "ProduceResults", "Sort"],
+            "scans": ["NodeByLabelScan"],
+        }
+
+    def test_regressions(self):
+        baseline = {
+            "UserNode.feed": {"dbHits": 1000, "scans": []},
+            "UserNode.follow": {"dbHits": 10, "scans": []},
+            "HashtagIndex.rebuild": {"dbHits": 500, "scans": []},
+        }
+        results = {
+            # Over max_growth and min_hits
+            "UserNode.feed": {"dbHits": 1600, "scans": []},
+            # Over max_growth only
+            "UserNode.follow": {"dbHits": 100, "scans": []},
+            "HashtagIndex.rebuild": {"dbHits": 500, "scans": ["NodeByLabelScan"]},
+            # Not in the baseline yet
+            "Query.search": {"dbHits": 5000, "scans": ["AllNodesScan"]},
+        }
+
+        assert regressions(results, baseline, expected_scans={"HashtagIndex.rebuild"}) == [
+            "UserNode.feed db hits 1000 -> 1600",
+            "Query.search uses AllNodesScan",
+        ]
+        assert regressions(results, results) == []
+
+
+class TestStatements:
+    def test_capture(self):
+        query, params = capture(registered_calls()["UserNode.follow"])
+        assert "merge (u)-[r:FOLLOWS]->(f)" in query
+        assert params["uid"] == params["followedUID"] == SAMPLE_UID
+
+        with pytest.raises(ValueError):
+            capture(lambda: None)
+
+    def test_registered_statements(self):
+        statements = registered_statements()
+        assert set(statements) == set(registered_calls())
+        for name, (query, params) in statements.items():
+            assert query.strip(), name
@@ -0,0 +1,118 @@
+import pytest
+from api.models.models import TweetNode
+from api.models.pagination import Page, decode_cursor
+from graphene_django.utils.testing import graphql_query
+from tests import queries
+
+
+class TestPage:
+    def test_dump_and_load(self):
+        tweets = [TweetNode(uid="b", content="second"), TweetNode(uid="a", content="first")]
+        page = Page([(tweets[0], 2.0), (tweets[1], 1.0)], 1, skip=1)
+
+        loaded = Page.load(page.dump(), TweetNode)
+        assert [tweet.content for tweet in loaded] == ["second"]
+        assert isinstance(loaded[0], TweetNode)
+        assert loaded.cursors == page.cursors
+        assert decode_cursor(loaded.cursors[0]) == (2.0, "b")
+        assert loaded.has_next_page and loaded.has_previous_page
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    def test_my_feed_cursor_pagination(self, create_user_node):
+        user = create_user_node()
+        to_follow = create_user_node(verified=True)
+
+        resp = graphql_query(
+            queries.follow,
+            variables={"uid": str(to_follow["node"].uid)},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        assert "errors" not in resp
+
+        for i in range(0, 5):
+            resp = graphql_query(
+                queries.tweet,
+                variables={"content": f"tweet {i}"},
+                headers={"HTTP_AUTHORIZATION": f"JWT {to_follow['token']}"},
+            ).json()
+            assert "errors" not in resp
+
+        contents = []
+        after = None
+        has_next_page = True
+        while has_next_page:
+            response = graphql_query(
+                queries.my_feed_connection,
+                variables={"limit": 2, "after": after},
+                headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+            ).json()
+            print(response)
+            assert "errors" not in response
+            connection = response["data"]["myFeedConnection"]
+            contents += [edge["node"]["content"] for edge in connection["edges"]]
+            has_next_page = connection["pageInfo"]["hasNextPage"]
+            after = connection["pageInfo"]["endCursor"]
+
+        assert contents == [f"tweet {i}" for i in range(4, -1, -1)]
+
+        response = graphql_query(
+            queries.my_feed_connection,
+            variables={"limit": 2, "before": after},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        print(response)
+        assert "errors" not in response
+        edges = response["data"]["myFeedConnection"]["edges"]
+        assert [edge["node"]["content"] for edge in edges] == ["tweet 2", "tweet 1"]
+
+    def test_my_followers_cursor_pagination(self, create_user_node):
+        user = create_user_node()
+
+        for i in range(0, 5):
+            follower = create_user_node(username=f"follower__{i}")
+            res_add_follower = graphql_query(
+                queries.follow,
+                variables={"uid": str(user["node"].uid)},
+                headers={"HTTP_AUTHORIZATION": f"JWT {follower['token']}"},
+            ).json()
+            assert "errors" not in res_add_follower
+
+        query = """query myFollowers($after: String) {
+            myProfile {
+                followersConnection(first: 3, after: $after) {
+                    edges {
+                        node {
+                            username
+                        }
+                    }
+                    pageInfo {
+                        hasNextPage
+                        endCursor
+                    }
+                }
+            }
+        }"""
+
+        response = graphql_query(query, headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"}).json()
+        print(response)
+        assert "errors" not in response
+        connection = response["data"]["myProfile"]["followersConnection"]
+        assert [edge["node"]["username"] for edge in connection["edges"]] == [
+            "follower__4",
+            "follower__3",
+            "follower__2",
+        ]
+        assert connection["pageInfo"]["hasNextPage"]
+
+        response = graphql_query(
+            query,
+            variables={"after": connection["pageInfo"]["endCursor"]},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        print(response)
+        assert "errors" not in response
+        connection = response["data"]["myProfile"]["followersConnection"]
+        assert [edge["node"]["username"] for edge in connection["edges"]] == ["follower__1", "follower__0"]
+        assert not connection["pageInfo"]["hasNextPage"]
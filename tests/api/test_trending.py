@@ -0,0 +1,67 @@
+import sys
+import threading
+from time import time
+
+from api.models.trending import Trend, TrendingHashtags
+
+# The module, api.models.trending is the instance exported by the package
+trending_module = sys.modules["api.models.trending"]
+
+
+class FakeDatabase:
+    """
+    Returns the counts of `rows` to every query, running `during` in the middle of the first one
+    """
+
+    def __init__(self, rows, during=None):
+        self.rows = rows
+        self.during = during
+        self.queries = 0
+
+    def cypher_query(self, query, params=None):
+        self.queries += 1
+        if self.during and self.queries == 1:
+            self.during()
+        return [(tag, params["until"] - 1, count) for tag, count in self.rows], None
+
+
+class TestTrendingHashtags:
+    def test_resync_counts_the_database(self, monkeypatch):
+        monkeypatch.setattr(trending_module, "db", FakeDatabase([("django", 3), ("neo4j", 1)]))
+        hashtags = TrendingHashtags()
+
+        assert hashtags.top("hour") == [Trend("django", 3), Trend("neo4j", 1)]
+        assert hashtags.top("day", limit=1) == [Trend("django", 3)]
+
+    def test_tweets_counted_during_resync_are_replayed(self, monkeypatch):
+        hashtags = TrendingHashtags()
+        # Created before the resync started, already counted by the database
+        during = lambda: [hashtags.add(["django"], time() - 1), hashtags.add(["neo4j", "django"])]  # noqa: E731
+        monkeypatch.setattr(trending_module, "db", FakeDatabase([("django", 3)], during))
+
+        hashtags.resync()
+        assert hashtags.top("hour") == [Trend("django", 4), Trend("neo4j", 1)]
+
+        # Counted in the windows once they exist
+        hashtags.add(["neo4j"])
+        assert hashtags.top("hour") == [Trend("django", 4), Trend("neo4j", 2)]
+
+    def test_single_thread_resyncs(self, monkeypatch, settings):
+        database = FakeDatabase([("django", 3)])
+        monkeypatch.setattr(trending_module, "db", database)
+        hashtags = TrendingHashtags()
+        hashtags.top("hour")
+        assert database.queries == 2
+
+        settings.TRENDING = {**settings.TRENDING, "RESYNC_INTERVAL": 0}
+        with hashtags._resync_lock:
+            # Served from the current windows while another thread resyncs
+            result = []
+            thread = threading.Thread(target=lambda: result.append(hashtags.top("hour")))
+            thread.start()
+            thread.join()
+            assert result == [[Trend("django", 3)]]
+            assert database.queries == 2
+
+        hashtags.top("hour")
+        assert database.queries == 4
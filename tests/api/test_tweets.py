@@ -1,8 +1,15 @@
+import sys
+from math import log
+
 import pytest
 import tests.queries as queries
 from accounts.exceptions import LOGIN_REQUIRED_ERROR_MSG, NOT_VERIFIED_ACCOUNT_ERROR_MSG
 from graphene_django.utils.testing import graphql_query
+from neo4j.exceptions import ClientError
 
+from api.models import CommentNode, TweetNode, UserNode
+from api.models.counters import counters
+from api.models.search import escape, fulltext_index
 from api.errors import (
     ALREADY_LIKED_ERROR,
     ALREADY_RETWEETED_ERROR,
@@ -11,13 +18,22 @@ from api.errors import (
     NOT_COMMENTABLE,
     NOT_LIKEABLE,
     RETWEET_NOT_FOUND_ERROR,
+    SEARCH_UNAVAILABLE_ERROR,
     TWEET_EMPTY_ERROR,
     TWEET_NOT_FOUND_ERROR,
     TWEET_TOO_LONG_ERROR,
     UNLIKED_ERROR,
+    USER_ALREADY_FOLLOWED_ERROR,
 )
 
 
+def count(cls, uid, field):
+    """
+    The stored counter of a node with its buffered delta
+    """
+    return getattr(cls.nodes.get(uid=uid), field) + counters.pending(uid, field)
+
+
 @pytest.mark.django_db
 class TestTweets:
     def test_unauthenticated_user_cannot_tweet(self):
@@ -281,6 +297,8 @@ class TestTweets:
         print(response2)
         assert "errors" in response2
         assert response2["errors"][0]["message"] == ALREADY_LIKED_ERROR
+        # The second like is not counted
+        assert count(TweetNode, tweet.uid, "likes") == tweet.likes + 1
 
     @pytest.mark.parametrize(
         ["type", "valid"],
@@ -321,6 +339,41 @@ class TestTweets:
             assert "errors" in response
             assert response["errors"][0]["message"] == UNLIKED_ERROR
 
+    def test_buffered_likes_are_flushed(self, create_user_node, create_node):
+        nb_likes = 42
+        tweet = create_node("TweetType", likes=nb_likes)
+
+        for i in range(0, 3):
+            user_token = create_user_node(token=True)
+            response = graphql_query(
+                queries.like,
+                variables={"uid": tweet.uid, "type": "TweetType"},
+                headers={"HTTP_AUTHORIZATION": f"JWT {user_token}"},
+            ).json()
+            print(response)
+            assert "errors" not in response
+            assert response["data"]["like"]["likes"] == nb_likes + i + 1
+
+        counters.flush()
+        assert counters.pending(tweet.uid, "likes") == 0
+        assert TweetNode.nodes.get(uid=tweet.uid).likes == nb_likes + 3
+
+    def test_written_through_likes_are_counted(self, settings, create_user_node, create_node):
+        settings.COUNTERS = {**settings.COUNTERS, "FLUSH_INTERVAL": 0}
+        nb_likes = 7
+        tweet = create_node("TweetType", likes=nb_likes)
+        user_token = create_user_node(token=True)
+
+        response = graphql_query(
+            queries.like,
+            variables={"uid": tweet.uid, "type": "TweetType"},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user_token}"},
+        ).json()
+        assert "errors" not in response
+        assert response["data"]["like"]["likes"] == nb_likes + 1
+        assert counters.pending(tweet.uid, "likes") == 0
+        assert TweetNode.nodes.get(uid=tweet.uid).likes == nb_likes + 1
+
     def test_user_must_like_before_unlike(self, create_user_node, create_node):
         type = "CommentType"
         tweet = create_node(type, likes=99)
@@ -333,6 +386,7 @@ class TestTweets:
         print(response)
         assert "errors" in response
         assert response["errors"][0]["message"] == UNLIKED_ERROR
+        assert count(CommentNode, tweet.uid, "likes") == 99
 
     def test_unauthenticated_user_cannot_comment(self, faker, create_tweet_node):
         tweet = create_tweet_node()
@@ -457,6 +511,22 @@ class TestTweets:
         print(response)
         assert "errors" in response
         assert response["errors"][0]["message"] == ALREADY_RETWEETED_ERROR
+        assert count(TweetNode, tweet_node.uid, "retweets") == tweet_node.retweets + 1
+
+    def test_cannot_follow_twice(self, create_user_node):
+        user_token = create_user_node(token=True)
+        followed = create_user_node()
+
+        for i in range(0, 2):
+            response = graphql_query(
+                queries.follow,
+                variables={"uid": str(followed["node"].uid)},
+                headers={"HTTP_AUTHORIZATION": f"JWT {user_token}"},
+            ).json()
+            print(response)
+            assert UserNode.nodes.get(uid=str(followed["node"].uid)).followers_count == 1
+
+        assert response["errors"][0]["message"] == USER_ALREADY_FOLLOWED_ERROR
 
     def test_retweet_reference_must_exist(self, create_user_node):
         user_token = create_user_node(token=True)
@@ -472,3 +542,187 @@ class TestTweets:
         print(response)
         assert "errors" in response
         assert response["errors"][0]["message"] == TWEET_NOT_FOUND_ERROR
+
+    def test_tweets_relations(self, create_user_node):
+        user = create_user_node(verified=True)
+
+        for i in range(0, 3):
+            response = graphql_query(
+                queries.tweet,
+                variables={"content": f"tweet {i}", "hashtags": [f"tag{i}", "common"]},
+                headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+            ).json()
+            assert "errors" not in response
+
+        response = graphql_query(
+            """query {
+                myProfile {
+                    tweets {
+                        content
+                        author {
+                            uid
+                        }
+                        hashtags {
+                            tag
+                        }
+                    }
+                }
+            }""",
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        print(response)
+
+        assert "errors" not in response
+        tweets = response["data"]["myProfile"]["tweets"]
+        assert len(tweets) == 3
+        for i, tweet in enumerate(reversed(tweets)):
+            assert tweet["author"]["uid"] == str(user["node"].uid)
+            assert sorted(hashtag["tag"] for hashtag in tweet["hashtags"]) == sorted([f"tag{i}", "common"])
+
+    def test_hashtags_are_normalized(self, faker, create_user_node):
+        my_token = create_user_node(verified=True, token=True)
+        tag = f"{faker.word()}{faker.random_int()}"
+
+        response = graphql_query(
+            queries.tweet,
+            variables={"content": faker.sentence(), "hashtags": [f"#{tag.upper()}", f" {tag} ", tag, " "]},
+            headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+        ).json()
+        print(response)
+
+        assert "errors" not in response
+        assert response["data"]["tweet"]["hashtags"] == [{"tag": tag, "tags": 1}]
+
+    def test_trending_hashtags(self, faker, create_user_node):
+        my_token = create_user_node(verified=True, token=True)
+        hot, warm = f"hot{faker.random_int()}", f"warm{faker.random_int()}"
+
+        for hashtags in [[hot], [hot, warm], [hot, warm], [hot]]:
+            response = graphql_query(
+                queries.tweet,
+                variables={"content": faker.sentence(), "hashtags": hashtags},
+                headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+            ).json()
+            assert "errors" not in response
+
+        for window in ["HOUR", "DAY"]:
+            response = graphql_query(
+                queries.trending_hashtags,
+                variables={"window": window, "limit": 50},
+                headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+            ).json()
+            print(response)
+
+            assert "errors" not in response
+            trends = response["data"]["trendingHashtags"]
+            tags = [trend["tag"] for trend in trends]
+            assert {"tag": hot, "count": 4} in trends
+            # other tests may have tagged more tweets than warm
+            if warm in tags:
+                assert {"tag": warm, "count": 2} in trends
+                assert tags.index(hot) < tags.index(warm)
+
+    def test_autocomplete_hashtags(self, faker, create_user_node):
+        my_token = create_user_node(verified=True, token=True)
+        prefix = f"auto{faker.random_int()}x"
+
+        for hashtags in [[f"{prefix}b"], [f"{prefix}a", f"{prefix}b"], [f"{prefix}c"], [f"{prefix}b"]]:
+            response = graphql_query(
+                queries.tweet,
+                variables={"content": faker.sentence(), "hashtags": hashtags},
+                headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+            ).json()
+            assert "errors" not in response
+
+        response = graphql_query(
+            queries.autocomplete_hashtags,
+            variables={"prefix": f"#{prefix.upper()}", "limit": 2},
+            headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+        ).json()
+        print(response)
+
+        assert "errors" not in response
+        suggestions = response["data"]["autocompleteHashtags"]
+        assert suggestions[0] == {"tag": f"{prefix}b", "tags": 3}
+        assert len(suggestions) == 2
+
+    def test_search_escapes_lucene_syntax(self):
+        assert escape("c++ (neo4j:graph) \"python\" -java") == r'c\+\+ \(neo4j\:graph\) \"python\" \-java'
+        # Operators are searched as terms
+        assert escape("NOT") == "not"
+        assert escape("cats AND") == "cats and"
+        assert escape("OR") == "or"
+        assert escape("ANDROID or NOTE") == "ANDROID or NOTE"
+
+    def test_search_tweets_rejected_query(self, monkeypatch, create_user_node):
+        my_token = create_user_node(token=True)
+        monkeypatch.setattr(fulltext_index, "name", lambda: "posts_1")
+        queries_run = []
+
+        class FakeDatabase:
+            def cypher_query(self, query, params=None, **kwargs):
+                queries_run.append(params["query"])
+                raise ClientError.hydrate("Failed to parse", "Neo.ClientError.Procedure.ProcedureCallFailed")
+
+        monkeypatch.setattr(sys.modules["api.models.pagination"], "db", FakeDatabase())
+
+        for query in ["NOT", "cats AND", "OR"]:
+            response = graphql_query(
+                queries.search_tweets,
+                variables={"query": query},
+                headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+            ).json()
+            print(response)
+
+            assert "errors" not in response
+            assert response["data"]["searchTweets"]["edges"] == []
+        assert queries_run == ["not", "cats and", "or"]
+
+    def test_search_tweets_unavailable(self, monkeypatch, create_user_node):
+        my_token = create_user_node(token=True)
+        monkeypatch.setattr(fulltext_index, "name", lambda: None)
+
+        response = graphql_query(
+            queries.search_tweets,
+            variables={"query": "neo4j"},
+            headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+        ).json()
+        assert response["errors"][0]["message"] == SEARCH_UNAVAILABLE_ERROR
+
+        # Blank queries match nothing, whether the index is available or not
+        response = graphql_query(
+            queries.search_tweets,
+            variables={"query": "  "},
+            headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+        ).json()
+        assert "errors" not in response
+        assert response["data"]["searchTweets"]["edges"] == []
+
+    @pytest.mark.parametrize("recency_boost", [True, False])
+    def test_search_tweets_ranking(self, monkeypatch, settings, create_user_node, recency_boost):
+        my_token = create_user_node(token=True)
+        monkeypatch.setattr(fulltext_index, "name", lambda: "posts_1")
+        statements = []
+
+        class FakeDatabase:
+            def cypher_query(self, query, params=None, **kwargs):
+                statements.append((query, params))
+                return [], None
+
+        monkeypatch.setattr(sys.modules["api.models.pagination"], "db", FakeDatabase())
+
+        response = graphql_query(
+            queries.search_tweets,
+            variables={"query": "c++ graph", "limit": 1000, "recencyBoost": recency_boost},
+            headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+        ).json()
+        print(response)
+
+        assert "errors" not in response
+        [(query, params)] = statements
+        # Comments are in the index too
+        assert "node:TweetNode" in query
+        assert params["index"] == "posts_1"
+        assert params["query"] == r"c\+\+ graph"
+        assert params["limit"] == settings.FULLTEXT["MAX_LIMIT"] + 1
+        assert params["boost"] == (log(2) / settings.FULLTEXT["HALF_LIFE"] if recency_boost else 0)
@@ -1,6 +1,7 @@
 from random import randint
 
 import pytest
+from django.conf import settings
 from graphene_django.utils.testing import graphql_query
 from neomodel import db as neodb
 from pytest_factoryboy import register
@@ -20,6 +21,12 @@ def setup_neo_test_db():
     neodb.rollback()
 
 
+@pytest.fixture(autouse=True, scope="session")
+def flush_counters_in_test_transaction():
+    # The flush thread would not see the nodes of the test transaction
+    settings.COUNTERS["FLUSH_THREAD"] = False
+
+
 @pytest.fixture
 def valid_user_payload(faker):
     # Call faker in the body and not the params to be able to create multiple distinct user in the same test
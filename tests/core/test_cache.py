@@ -0,0 +1,68 @@
+import pytest
+from graphene_django.utils.testing import graphql_query
+from tests import queries
+
+
+@pytest.mark.django_db
+class TestFieldCache:
+    def test_cached_search_sees_new_tweets(self, faker, create_user_node):
+        my_token = create_user_node(verified=True, token=True)
+        tag = f"{faker.word()}{faker.random_int()}"
+
+        for i in range(0, 2):
+            response = graphql_query(
+                queries.tweet,
+                variables={"content": f"tweet {i}", "hashtags": [tag]},
+                headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+            ).json()
+            assert "errors" not in response
+
+            response = graphql_query(
+                queries.search,
+                variables={"tag": tag},
+                headers={"HTTP_AUTHORIZATION": f"JWT {my_token}"},
+            ).json()
+            print(response)
+            assert "errors" not in response
+            assert len(response["data"]["search"]) == i + 1
+
+    def test_cached_profile_sees_new_followers(self, create_user_node):
+        user = create_user_node()
+
+        for i in range(0, 2):
+            response = graphql_query(
+                queries.user_profile,
+                variables={"uid": str(user["node"].uid)},
+                headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+            ).json()
+            print(response)
+            assert response["data"]["userProfile"]["followersCount"] == i
+
+            follower = create_user_node()
+            response = graphql_query(
+                queries.follow,
+                variables={"uid": str(user["node"].uid)},
+                headers={"HTTP_AUTHORIZATION": f"JWT {follower['token']}"},
+            ).json()
+            assert "errors" not in response
+
+    def test_cached_profile_loads_its_relations(self, create_user_node, create_node):
+        user = create_user_node(verified=True)
+
+        for i in range(0, 2):
+            response = graphql_query(
+                queries.user_profile,
+                variables={"uid": str(user["node"].uid)},
+                headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+            ).json()
+            print(response)
+            assert "errors" not in response
+            assert response["data"]["userProfile"]["username"] == user["node"].username
+            assert len(response["data"]["userProfile"]["tweets"]) == i
+
+            response = graphql_query(
+                queries.tweet,
+                variables={"content": create_node("TweetType").content},
+                headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+            ).json()
+            assert "errors" not in response
@@ -0,0 +1,209 @@
+import json
+
+import pytest
+from api.errors import PERSISTED_QUERY_NOT_FOUND_ERROR, QUERY_TOO_COMPLEX_ERROR, QUERY_TOO_DEEP_ERROR
+from asgiref.sync import async_to_sync
+from core.persisted import query_hash
+from core.views import GraphQLView, run_in_thread
+from django.views.decorators.csrf import csrf_exempt
+from graphene_django.utils.testing import graphql_query
+from tests import queries
+
+
+@pytest.mark.django_db
+class TestGraphQLView:
+    def test_operations_are_instrumented(self, settings, create_user_node):
+        user = create_user_node()
+
+        settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "EXTENSIONS": False}
+        response = graphql_query(
+            queries.my_followers,
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        assert "errors" not in response
+        assert "extensions" not in response
+
+        settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "EXTENSIONS": True}
+        response = graphql_query(
+            queries.my_followers,
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        print(response)
+
+        assert "errors" not in response
+        instrumentation = response["extensions"]["instrumentation"]
+        assert instrumentation["operation"] == "myFollowers"
+        assert instrumentation["cypher"] >= 1
+        assert instrumentation["sql"] >= 1
+        assert len(instrumentation["slowest"]) <= 5
+        assert "Query.myProfile" in instrumentation["resolvers"]
+
+    def test_metrics_endpoint(self, client, create_user_node):
+        user = create_user_node()
+
+        response = graphql_query(
+            queries.my_followers,
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        assert "errors" not in response
+
+        metrics = client.get("/metrics").content.decode()
+        assert 'graphql_resolver_duration_seconds_count{field="Query.myProfile"}' in metrics
+        assert 'graphql_resolver_duration_seconds_count{field="UserType.followers"}' in metrics
+        assert 'field="UserType.uid"' not in metrics
+
+        assert client.get("/metrics", REMOTE_ADDR="203.0.113.7").status_code == 403
+
+    def test_async_view_runs_operations_in_thread_pool(self, rf):
+        view = run_in_thread(csrf_exempt(GraphQLView.as_view()))
+        request = rf.post("/graphql/", {"query": "{ __typename }"}, content_type="application/json")
+
+        response = async_to_sync(view)(request)
+        assert response.status_code == 200
+        assert json.loads(response.content)["data"] == {"__typename": "Query"}
+
+    def test_expensive_queries_are_rejected(self, create_user_node):
+        user = create_user_node()
+
+        response = graphql_query(
+            queries.user_followers_of_followers,
+            variables={"uid": str(user["node"].uid), "first": 100},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        )
+        assert response.status_code == 400
+        assert response.json()["errors"][0]["message"] == QUERY_TOO_COMPLEX_ERROR
+
+        response = graphql_query(
+            queries.user_followers_of_followers,
+            variables={"uid": str(user["node"].uid), "first": 5},
+            headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+        ).json()
+        assert "errors" not in response
+
+        # Every item of a page is charged, not only the nested pages
+        wide = "{ myFeed(limit: 100) { ... on TweetType { author { followers(first: 100) { uid } } } } }"
+        response = graphql_query(wide, headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"})
+        assert response.status_code == 400
+        assert response.json()["errors"][0]["message"] == QUERY_TOO_COMPLEX_ERROR
+
+        nested = "followers { " * 10 + "uid" + " }" * 10
+        response = graphql_query(f"{{ myProfile {{ {nested} }} }}")
+        assert response.status_code == 400
+        assert response.json()["errors"][0]["message"] == QUERY_TOO_DEEP_ERROR
+
+    def test_persisted_queries(self, client, create_user_node):
+        user = create_user_node()
+        follower = create_user_node()
+        response = graphql_query(
+            queries.follow,
+            variables={"uid": str(user["node"].uid)},
+            headers={"HTTP_AUTHORIZATION": f"JWT {follower['token']}"},
+        ).json()
+        assert "errors" not in response
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(queries.my_followers)}}
+
+        def post(data):
+            return client.post(
+                "/graphql/",
+                data,
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"JWT {user['token']}",
+            ).json()
+
+        response = post({"extensions": extensions})
+        assert response["errors"][0]["message"] == PERSISTED_QUERY_NOT_FOUND_ERROR
+
+        response = post({"query": queries.my_followers, "extensions": extensions})
+        assert "errors" not in response
+        assert len(response["data"]["myProfile"]["followers"]) == 1
+
+        response = post({"extensions": extensions, "variables": {"first": 0}})
+        assert "errors" not in response
+        assert response["data"]["myProfile"]["followers"] == []
+
+    def test_documents_are_cached(self, create_user_node):
+        user = create_user_node()
+        documents = GraphQLView.documents()
+
+        hits = documents.hits
+        for _ in range(2):
+            response = graphql_query(
+                queries.my_subs,
+                headers={"HTTP_AUTHORIZATION": f"JWT {user['token']}"},
+            ).json()
+            assert "errors" not in response
+        assert documents.hits > hits
+
+    def test_batched_operations(self, client, create_user_node):
+        user = create_user_node()
+        followed_user = create_user_node()
+
+        response = client.post(
+            "/graphql/",
+            [
+                {"query": queries.my_subs, "id": "before"},
+                {"query": queries.follow, "variables": {"uid": str(followed_user["node"].uid)}},
+                {"query": queries.my_subs, "id": "after"},
+            ],
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {user['token']}",
+        ).json()
+        assert [operation.get("errors") for operation in response] == [None, None, None]
+        assert [operation["id"] for operation in response] == ["before", None, "after"]
+        assert response[0]["data"]["myProfile"]["follows"] == []
+        assert len(response[2]["data"]["myProfile"]["follows"]) == 1
+
+    def test_batched_operations_fail_alone(self, client, create_user_node):
+        user = create_user_node()
+
+        response = client.post(
+            "/graphql/",
+            [{"query": queries.my_subs}, {"variables": {}}, {"query": queries.my_subs}],
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {user['token']}",
+        )
+        assert response.status_code == 400
+        response = response.json()
+        assert [operation["status"] for operation in response] == [200, 400, 200]
+        assert response[1]["errors"][0]["message"] == "Must provide query string."
+        assert response[2]["data"]["myProfile"]["follows"] == []
+
+    def test_batched_operations_share_the_cost_budget(self, settings, client, create_user_node):
+        user = create_user_node()
+        settings.GRAPHQL_LIMITS = {**settings.GRAPHQL_LIMITS, "MAX_COST": 150}
+
+        # Each operation costs 101, within the budget alone
+        response = client.post(
+            "/graphql/",
+            [{"query": queries.my_subs}, {"query": queries.my_subs}],
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {user['token']}",
+        ).json()
+        assert "errors" not in response[0]
+        assert response[1]["errors"][0]["message"] == QUERY_TOO_COMPLEX_ERROR
+        assert response[1]["errors"][0]["extensions"] == {"cost": 101, "spent": 101, "maxCost": 150}
+
+    def test_batched_operations_share_authentication_and_loaders(self, settings, client, create_user_node):
+        settings.GRAPHQL_INSTRUMENTATION = {**settings.GRAPHQL_INSTRUMENTATION, "EXTENSIONS": True}
+        user = create_user_node()
+        follower = create_user_node()
+        response = graphql_query(
+            queries.follow,
+            variables={"uid": str(user["node"].uid)},
+            headers={"HTTP_AUTHORIZATION": f"JWT {follower['token']}"},
+        ).json()
+        assert "errors" not in response
+
+        response = client.post(
+            "/graphql/",
+            [{"query": queries.my_followers}, {"query": queries.my_followers}],
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"JWT {user['token']}",
+        ).json()
+        print(response)
+        assert response[0]["data"] == response[1]["data"]
+        first, second = [operation["extensions"]["instrumentation"] for operation in response]
+        # The account of the token and the accounts of the followers are loaded by the first operation only
+        assert first["sql"] >= 2
+        assert second["sql"] == 0
+        assert second["cypher"] == first["cypher"]
@@ -144,6 +144,21 @@ user_followers = """query userFollowers(
   }
 }"""
 
+user_followers_of_followers = """query userFollowersOfFollowers(
+    $uid: String!,
+    $first: Int
+) {
+  userProfile(uid: $uid) {
+    followers(first: $first) {
+      followers(first: $first) {
+        follows(first: $first) {
+          uid
+        }
+      }
+    }
+  }
+}"""
+
 user_subs = """query userSubs(
     $uid: String!
 ) {
@@ -249,6 +264,35 @@ my_feed = """query myFeed(
 }
 """
 
+my_feed_connection = """query myFeedConnection(
+  $limit: Int=10,
+  $after: String,
+  $before: String
+) {
+  myFeedConnection(limit: $limit, after: $after, before: $before) {
+    edges {
+      cursor
+      node {
+        __typename
+        ... on BaseDatedType {
+          uid
+          created
+        }
+        ... on TweetType {
+          content
+        }
+      }
+    }
+    pageInfo {
+      hasNextPage
+      hasPreviousPage
+      startCursor
+      endCursor
+    }
+  }
+}
+"""
+
 search = """query mySearch(
   $tag: String!,
   $skip: Int,
@@ -262,6 +306,48 @@ search = """query mySearch(
 }
 """
 
+trending_hashtags = """query trendingHashtags(
+  $window: TrendingWindow,
+  $limit: Int
+) {
+  trendingHashtags(window: $window, limit: $limit){
+    tag
+    count
+  }
+}
+"""
+
+
+search_tweets = """query searchTweets(
+  $query: String!,
+  $limit: Int,
+  $recencyBoost: Boolean
+) {
+  searchTweets(query: $query, limit: $limit, recencyBoost: $recencyBoost){
+    edges {
+      node {
+        ... on TweetType {
+          uid
+          content
+        }
+      }
+    }
+  }
+}
+"""
+
+
+autocomplete_hashtags = """query autocompleteHashtags(
+  $prefix: String!,
+  $limit: Int
+) {
+  autocompleteHashtags(prefix: $prefix, limit: $limit){
+    tag
+    tags
+  }
+}
+"""
+
 
 # Tweet queries
 tweet = """mutation newTweet(